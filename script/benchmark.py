@@ -0,0 +1,431 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from .crosscorr import LAGS, WINDOWS, lagged_correlation, rolling_correlation
+from .features import hour_ampm, publisher_domain, sentiment_label
+from .report import plot_macd
+from .indicators import DEFAULT_INDICATORS, compute_indicator
+from .instrument import rss_bytes
+from .loader import ROOT_DIR, load_all_prices, load_news, stock_symbol
+from .phrases import PhraseCounter
+from .sentiment import score_headlines
+from .stages import compute_indicators, correlate, enrich, merge_sentiment
+
+
+# Write synthetic "*_historical_data.csv" files with the same layout as the real ones
+def make_price_files(data_dir, n_tickers, n_days=2500, seed=0):
+    rng = np.random.default_rng(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    dates = pd.bdate_range('2010-01-04', periods=n_days).strftime('%Y-%m-%d')
+    paths = []
+    for i in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        data = pd.DataFrame({
+            'Date': dates,
+            'Open': close * (1 + rng.normal(0, 0.005, n_days)),
+            'High': close * 1.01,
+            'Low': close * 0.99,
+            'Close': close,
+            'Adj Close': close,
+            'Volume': rng.integers(1_000_000, 50_000_000, n_days),
+            'Dividends': 0.0,
+            'Stock Splits': 0.0,
+        })
+        path = os.path.join(data_dir, f"T{i:05d}_historical_data.csv")
+        data.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+# The original approach: grow the combined frame with pd.concat inside the loop
+def concat_loop(paths):
+    combined_data = pd.DataFrame()
+    for file_path in paths:
+        data = pd.read_csv(file_path)
+        data['Stock'] = stock_symbol(file_path)
+        combined_data = pd.concat([combined_data, data], ignore_index=True)
+    return combined_data
+
+
+# Time a function call, returning (seconds, result)
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+# Compare the concat loop with the bulk loader as the number of tickers grows
+def benchmark_price_loading(ticker_counts=(10, 100, 500, 1000, 2000), n_days=2500, loop_limit=500):
+    rows = []
+    work_dir = tempfile.mkdtemp(prefix='price_bench_')
+    try:
+        for n_tickers in ticker_counts:
+            data_dir = os.path.join(work_dir, str(n_tickers))
+            cache_dir = os.path.join(data_dir, 'cache')
+            paths = make_price_files(data_dir, n_tickers, n_days)
+
+            # The first bulk load also builds the Parquet cache; the second is served from it
+            cold, _ = timed(load_all_prices, paths, cache_dir=cache_dir)
+            warm, combined = timed(load_all_prices, paths, cache_dir=cache_dir)
+            loop = timed(concat_loop, paths)[0] if n_tickers <= loop_limit else np.nan
+
+            rows.append({'tickers': n_tickers, 'rows': len(combined), 'concat_loop_s': loop,
+                         'bulk_cold_s': cold, 'bulk_warm_s': warm,
+                         'warm_us_per_ticker': 1e6 * warm / n_tickers})
+            shutil.rmtree(data_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return pd.DataFrame(rows)
+
+
+# Synthetic merged (Date, Stock, Daily_Return, Sentiment) frame, with news on a fraction of days
+def make_merged_returns(n_tickers, n_days=2500, news_fraction=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2010-01-04', periods=n_days)
+    sentiment = rng.normal(0, 0.2, (n_tickers, n_days))
+    sentiment[rng.random((n_tickers, n_days)) > news_fraction] = np.nan
+    return pd.DataFrame({
+        'Date': np.tile(dates, n_tickers),
+        'Stock': pd.Categorical(np.repeat([f"T{i:05d}" for i in range(n_tickers)], n_days)),
+        'Daily_Return': rng.normal(0, 0.02, n_tickers * n_days),
+        'Sentiment': sentiment.ravel(),
+    })
+
+
+# The apply-based approach of correlation.py, extended naively to the lag/window grid
+def apply_correlation_grid(merged, lags=LAGS, windows=WINDOWS, min_periods=3):
+    grouped = merged.groupby('Stock', observed=True)
+    lagged = {lag: grouped.apply(lambda x: x['Daily_Return'].corr(x['Sentiment'].shift(lag))) for lag in lags}
+    rolling = {(window, lag): grouped.apply(
+        lambda x: x['Daily_Return'].rolling(window, min_periods=min_periods).corr(x['Sentiment'].shift(lag)))
+        for window in windows for lag in lags}
+    return pd.DataFrame(lagged), rolling
+
+
+# Time the cumulative-sum correlation engine against the apply-based grid (tests/test_crosscorr.py
+# checks that they agree)
+def benchmark_correlation_grid(ticker_counts=(10, 50, 200), n_days=2500, apply_limit=50):
+    rows = []
+    for n_tickers in ticker_counts:
+        merged = make_merged_returns(n_tickers, n_days)
+        lagged_s, _ = timed(lagged_correlation, merged)
+        rolling_s, _ = timed(rolling_correlation, merged)
+        row = {'tickers': n_tickers, 'cells': n_tickers * n_days * len(LAGS) * len(WINDOWS),
+               'lagged_s': lagged_s, 'rolling_s': rolling_s, 'apply_s': np.nan}
+        if n_tickers <= apply_limit:
+            row['apply_s'] = timed(apply_correlation_grid, merged)[0]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+# Synthetic news frame with analysis.py's columns: a few publishers, a sentiment score and hours
+def make_news_features(n_rows, n_publishers=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    publishers = np.array([f"writer{i}@site{i % 50}.com" if i % 3 else f"Writer {i}" for i in range(n_publishers)])
+    return pd.DataFrame({
+        'headline': pd.Series(rng.choice(['Stock rises', 'Shares fall on weak earnings', 'Price target raised'], n_rows)),
+        'publisher': publishers[rng.integers(0, n_publishers, n_rows)],
+        'sentiment': np.round(rng.normal(0, 0.3, n_rows), 1),
+        'hour': rng.integers(0, 24, n_rows),
+    })
+
+
+# The per-row helpers analysis.py used before features.py
+def apply_features(data):
+    def convert_to_ampm(hour):
+        if hour == 0:
+            return '12 AM'
+        elif hour < 12:
+            return f'{hour} AM'
+        elif hour == 12:
+            return '12 PM'
+        else:
+            return f'{hour - 12} PM'
+
+    def extract_domain(email):
+        match = re.search(r'@([\w.-]+)', email)
+        return match.group(1) if match else None
+
+    return pd.DataFrame({
+        'headline_length': data['headline'].apply(len),
+        'sentiment_label': data['sentiment'].apply(lambda x: 'positive' if x > 0 else ('negative' if x < 0 else 'neutral')),
+        'hour_ampm': data['hour'].apply(convert_to_ampm),
+        'publisher_domain': data['publisher'].apply(extract_domain),
+    })
+
+
+def vectorized_features(data):
+    return pd.DataFrame({
+        'headline_length': data['headline'].str.len(),
+        'sentiment_label': sentiment_label(data['sentiment']),
+        'hour_ampm': hour_ampm(data['hour']),
+        'publisher_domain': publisher_domain(data['publisher']),
+    })
+
+
+# Time the vectorized feature extraction against the per-row apply helpers (tests/test_features.py
+# checks that they agree)
+def benchmark_features(row_counts=(100_000, 1_000_000, 3_000_000)):
+    rows = []
+    for n_rows in row_counts:
+        data = make_news_features(n_rows)
+        apply_s = timed(apply_features, data)[0]
+        vectorized_s = timed(vectorized_features, data)[0]
+        rows.append({'rows': n_rows, 'apply_s': apply_s, 'vectorized_s': vectorized_s,
+                     'speedup': apply_s / vectorized_s})
+    return pd.DataFrame(rows)
+
+
+# Synthetic per-ticker indicator frame with the columns the report charts draw
+def make_indicator_frame(n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+    data = pd.DataFrame({'Date': pd.bdate_range('1990-01-01', periods=n_days), 'Close': close})
+    for indicator, params in DEFAULT_INDICATORS:
+        for name, values in compute_indicator(close, indicator, params).items():
+            data[name] = values
+    return data
+
+
+# The MACD chart as quantitativeAnalysis.py drew it: every point, one bar patch per day
+def full_macd(ax, data, stock_symbol):
+    ax.plot(data['Date'], data['MACD'], label='MACD')
+    ax.plot(data['Date'], data['MACD_Signal'], label='MACD Signal')
+    ax.bar(data['Date'], data['MACD_Hist'], label='MACD Histogram')
+    ax.legend()
+
+
+def render_seconds(draw, data, path):
+    fig = Figure(figsize=(14, 8))
+    start = time.perf_counter()
+    draw(fig.add_subplot(), data, 'TEST')
+    fig.savefig(path, dpi=100)
+    return time.perf_counter() - start
+
+
+# Time the full and the decimated MACD chart as the history grows
+def benchmark_plotting(day_counts=(2500, 10_000, 50_000), full_limit=10_000):
+    rows = []
+    work_dir = tempfile.mkdtemp(prefix='plot_bench_')
+    try:
+        path = os.path.join(work_dir, 'macd.png')
+        for n_days in day_counts:
+            data = make_indicator_frame(n_days)
+            full = render_seconds(full_macd, data, path) if n_days <= full_limit else np.nan
+            rows.append({'days': n_days, 'full_s': full, 'decimated_s': render_seconds(plot_macd, data, path)})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return pd.DataFrame(rows)
+
+
+# Benchmark scales: headlines in the news file and tickers (each with n_days of prices)
+SCALES = {
+    'small': {'n_headlines': 10_000, 'n_tickers': 10},
+    'medium': {'n_headlines': 1_000_000, 'n_tickers': 500},
+    'large': {'n_headlines': 10_000_000, 'n_tickers': 5000},
+}
+
+# Default location of the stored baseline the suite compares against
+BASELINE_PATH = os.path.join(ROOT_DIR, "benchmarks", "baseline.json")
+
+# A stage regresses when it is this many times slower (or larger) than the baseline, by at
+# least the absolute margins below (tiny stages are too noisy to compare by ratio alone)
+TOLERANCE = 1.25
+MIN_SECONDS = 0.05
+MIN_MB = 16
+
+HEADLINE_WORDS = ['stock', 'shares', 'price', 'target', 'earnings', 'rises', 'falls', 'beat', 'miss',
+                  'upgrade', 'downgrade', 'strong', 'weak', 'good', 'bad', 'great', 'terrible', 'guidance',
+                  'revenue', 'quarter', 'outlook', 'analyst', 'buy', 'sell', 'hold', 'record', 'low', 'high',
+                  'dividend', 'split', 'merger', 'deal', 'lawsuit', 'sales', 'growth', 'cut', 'raise']
+PUBLISHERS = ['Benzinga Newsdesk', 'Lisa Levin', 'ETF Professor', 'Paul Quintaro', 'Charles Gross',
+              'Monica Gerson', 'Eddie Staley', 'Hal Lindon', 'a@benzinga.com', 'b@gmail.com']
+
+
+# Write a synthetic news CSV with the layout of raw_analysis_ratings.csv. Headlines are drawn
+# from a pool of unique_fraction * n_headlines distinct texts, as syndication repeats headlines.
+def make_news_file(path, n_headlines, tickers, unique_fraction=0.05, seed=0, chunk_size=1_000_000):
+    rng = np.random.default_rng(seed)
+    words = np.array(HEADLINE_WORDS)
+    n_unique = max(1, int(n_headlines * unique_fraction))
+    lengths = rng.integers(4, 11, n_unique)
+    picks = rng.integers(0, len(words), (n_unique, 10))
+    headlines = np.array([' '.join(words[row[:length]]).capitalize() for row, length in zip(picks, lengths)],
+                         dtype=object)
+    tickers = np.asarray(tickers, dtype=object)
+    first, last = np.datetime64('2011-01-01T00:00:00').astype(np.int64), np.datetime64('2020-06-30T00:00:00').astype(np.int64)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for start in range(0, n_headlines, chunk_size):
+        n = min(chunk_size, n_headlines - start)
+        seconds = rng.integers(first, last, n).astype('datetime64[s]')
+        data = pd.DataFrame({
+            'headline': headlines[rng.integers(0, n_unique, n)],
+            'url': 'https://www.benzinga.com/news/x',
+            'publisher': np.array(PUBLISHERS, dtype=object)[rng.integers(0, len(PUBLISHERS), n)],
+            'date': np.char.add(np.datetime_as_string(seconds, unit='s'), '-04:00'),
+            'stock': tickers[rng.integers(0, len(tickers), n)],
+        }, index=pd.RangeIndex(start, start + n))
+        data.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0)
+    return path
+
+
+# Time a call and measure the peak memory it adds: resident memory sampled from a background
+# thread where /proc is available (this also sees pyarrow and C allocations), tracemalloc otherwise.
+# Memory freed by an earlier stage but kept by the allocator is reused without showing up here.
+def measured(func, *args, interval=0.005, **kwargs):
+    gc.collect()
+    start_rss = rss_bytes()
+    peak = [start_rss or 0]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], rss_bytes())
+
+    if start_rss is None:
+        tracemalloc.start()
+    else:
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        done.set()
+    if start_rss is None:
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        sampler.join()
+        peak_bytes = max(peak[0], rss_bytes()) - start_rss
+    return seconds, peak_bytes, result
+
+
+# Time every stage of the analysis on synthetic data of the given scale, entirely offline
+def run_suite(n_headlines, n_tickers, n_days=2500, unique_fraction=0.05, loop_limit=500):
+    rows = []
+
+    def stage(name, n_rows, func, *args, **kwargs):
+        seconds, peak_bytes, result = measured(func, *args, **kwargs)
+        rows.append({'stage': name, 'rows': n_rows, 'seconds': seconds, 'peak_mb': peak_bytes / 2 ** 20})
+        return result
+
+    work_dir = tempfile.mkdtemp(prefix='bench_suite_')
+    try:
+        data_dir = os.path.join(work_dir, 'data')
+        cache_dir = os.path.join(work_dir, 'cache')
+        sentiment_cache = os.path.join(cache_dir, 'sentiment_cache.pkl')
+        paths = make_price_files(data_dir, n_tickers, n_days)
+        news_path = make_news_file(os.path.join(data_dir, 'raw_analysis_ratings.csv'), n_headlines,
+                                   [stock_symbol(path) for path in paths], unique_fraction)
+        n_prices = n_tickers * n_days
+
+        # The first loads convert the CSVs to Parquet; the second ones are served from the cache
+        stage('news_csv_to_parquet', n_headlines, load_news, news_path, cache_dir=cache_dir)
+        news = stage('news_load', n_headlines, load_news, news_path, cache_dir=cache_dir)
+        stage('prices_csv_to_parquet', n_prices, load_all_prices, paths, cache_dir=cache_dir)
+        prices = stage('prices_load', n_prices, load_all_prices, paths, cache_dir=cache_dir)
+        if n_tickers <= loop_limit:
+            stage('prices_concat_loop', n_prices, concat_loop, paths)
+
+        stage('enrich', n_headlines, enrich, news)
+        sentiment = stage('sentiment_cold', n_headlines, score_headlines, news['headline'], cache_path=sentiment_cache)
+        stage('sentiment_warm', n_headlines, score_headlines, news['headline'], cache_path=sentiment_cache)
+        stage('phrases', n_headlines, PhraseCounter(max_n=3).update, news['headline'].str.lower())
+        panel = stage('indicators', n_prices, compute_indicators, prices)
+        merged = stage('merge', n_prices, merge_sentiment, news, sentiment.rename('Sentiment'), panel)
+        stage('correlate', n_prices, correlate, merged)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return pd.DataFrame(rows)
+
+
+# Store a suite run, with the scale and environment it was measured in
+def save_baseline(results, scale, path=BASELINE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {
+        'scale': scale,
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                        'machine': platform.machine(), 'cpus': os.cpu_count()},
+        'stages': results.to_dict(orient='records'),
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+# Time and memory of each stage relative to the baseline, flagging regressions
+def compare_to_baseline(results, baseline, tolerance=TOLERANCE):
+    reference = pd.DataFrame(baseline['stages']).set_index('stage')[['seconds', 'peak_mb']]
+    joined = results.set_index('stage').join(reference, rsuffix='_baseline')
+    joined['time_ratio'] = joined['seconds'] / joined['seconds_baseline']
+    joined['memory_ratio'] = joined['peak_mb'] / joined['peak_mb_baseline']
+    slower = (joined['time_ratio'] > tolerance) & (joined['seconds'] - joined['seconds_baseline'] > MIN_SECONDS)
+    larger = (joined['memory_ratio'] > tolerance) & (joined['peak_mb'] - joined['peak_mb_baseline'] > MIN_MB)
+    joined['regressed'] = slower | larger
+    return joined.reset_index()
+
+
+# The earlier side-by-side comparisons
+def run_micro_benchmarks():
+    print(benchmark_price_loading().to_string(index=False))
+    print(benchmark_correlation_grid().to_string(index=False))
+    print(benchmark_features().to_string(index=False))
+    print(benchmark_plotting().to_string(index=False))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time each analysis stage on synthetic data and compare to a baseline")
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--headlines', type=int, help="override the number of headlines of the scale")
+    parser.add_argument('--tickers', type=int, help="override the number of tickers of the scale")
+    parser.add_argument('--days', type=int, default=2500, help="trading days of prices per ticker")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--micro', action='store_true', help="run the old-vs-new comparisons instead")
+    args = parser.parse_args()
+
+    if args.micro:
+        run_micro_benchmarks()
+        sys.exit(0)
+
+    scale = dict(SCALES[args.scale], n_days=args.days)
+    if args.headlines:
+        scale['n_headlines'] = args.headlines
+    if args.tickers:
+        scale['n_tickers'] = args.tickers
+    results = run_suite(**scale)
+    print(results.to_string(index=False))
+
+    if args.save_baseline:
+        save_baseline(results, scale, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        baseline = load_baseline(args.baseline)
+        if baseline['scale'] != scale:
+            print(f"Warning: baseline was measured at {baseline['scale']}, this run at {scale}")
+        comparison = compare_to_baseline(results, baseline, args.tolerance)
+        print(comparison[['stage', 'seconds', 'seconds_baseline', 'time_ratio', 'peak_mb', 'peak_mb_baseline',
+                          'memory_ratio', 'regressed']].to_string(index=False))
+        sys.exit(1 if comparison['regressed'].any() else 0)
@@ -0,0 +1,190 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from .features import day_of_week, hour_ampm, month, publisher_domain, sentiment_label
+from .loader import NEWS_PATH
+from .phrases import PhraseCounter
+from .sentiment import CACHE_PATH, SentimentCache, score_headlines
+
+# Rows read from the CSV at a time. Peak memory is a chunk plus the accumulators, which grow with
+# the number of distinct publishers, days and domains (and by 8 bytes a row when duplicate rows
+# are counted), plus the sentiment cache, loaded once for the whole stream.
+CHUNK_SIZE = 100_000
+
+# Distinct phrases kept per n-gram table. When the vocabulary outgrows it the rarest phrases are
+# dropped after each chunk, so the top phrases are approximate: a phrase that is rare early in the
+# file and frequent later can be undercounted. Below the capacity the counts are exact.
+PHRASE_CAPACITY = 200_000
+
+# Derived fields whose per-value article counts are accumulated
+COUNT_FIELDS = ['publisher', 'date', 'day_of_week', 'month', 'year', 'hour_ampm',
+                'sentiment_label', 'publisher_domain']
+
+
+# Add two count Series, treating labels missing from either side as zero
+def add_counts(left, right):
+    if left.empty:
+        return right.astype('int64')
+    if right.empty:
+        return left
+    return left.add(right, fill_value=0).astype('int64')
+
+
+# Mergeable accumulators for the aggregate statistics printed by analysis.py. Headlines are
+# scored against `sentiment_cache` when one is given, else against the sentiment cache file.
+class NewsStatistics:
+    def __init__(self, count_duplicates=False, sentiment_cache=None, phrase_capacity=PHRASE_CAPACITY):
+        self.rows = 0
+        self.columns = []
+        self.missing = pd.Series(dtype='int64')
+        self.count_duplicates = count_duplicates
+        self.row_hashes = []
+        # Headline lengths are small integers, so an exact histogram serves as the quantile sketch
+        self.length_histogram = np.zeros(0, dtype=np.int64)
+        self.counts = {field: pd.Series(dtype='int64') for field in COUNT_FIELDS}
+        self.publisher_sentiment = pd.Series(dtype='int64')
+        self.phrases = PhraseCounter(max_n=3, capacity=phrase_capacity)
+        self.sentiment_cache = sentiment_cache
+
+    # Fold one chunk of the raw news CSV into the accumulators
+    def update(self, chunk):
+        chunk = chunk.rename(columns={chunk.columns[0]: 'SNo'})
+        self.rows += len(chunk)
+        self.columns = self.columns or list(chunk.columns)
+        self.missing = add_counts(self.missing, chunk.isnull().sum()).reindex(self.columns)
+        if self.count_duplicates:
+            self.row_hashes.append(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+
+        lengths = chunk['headline'].str.len().dropna().astype(np.int64).to_numpy()
+        histogram = np.bincount(lengths)
+        size = max(len(histogram), len(self.length_histogram))
+        self.length_histogram = np.pad(self.length_histogram, (0, size - len(self.length_histogram))) + \
+            np.pad(histogram, (0, size - len(histogram)))
+
+        headlines = chunk['headline'].str.lower()
+        self.phrases.update(headlines)
+
+        date = pd.to_datetime(chunk['date'], format='ISO8601')
+        sentiment = score_headlines(headlines, cache=self.sentiment_cache)
+        derived = pd.DataFrame({
+            'publisher': chunk['publisher'],
+            'date': date.dt.date,
+            'day_of_week': day_of_week(date),
+            'month': month(date),
+            'year': date.dt.year,
+            'hour_ampm': hour_ampm(date.dt.hour),
+            'sentiment_label': sentiment_label(sentiment),
+            'publisher_domain': publisher_domain(chunk['publisher']),
+        })
+        for field in COUNT_FIELDS:
+            self.counts[field] = add_counts(self.counts[field], derived[field].value_counts().astype('int64'))
+        self.publisher_sentiment = add_counts(
+            self.publisher_sentiment, derived.groupby(['publisher', 'sentiment_label']).size())
+        return self
+
+    # Combine with accumulators built from another part of the file
+    def merge(self, other):
+        self.rows += other.rows
+        self.columns = self.columns or other.columns
+        self.missing = add_counts(self.missing, other.missing).reindex(self.columns)
+        self.count_duplicates = self.count_duplicates and other.count_duplicates
+        self.row_hashes.extend(other.row_hashes)
+        size = max(len(self.length_histogram), len(other.length_histogram))
+        self.length_histogram = np.pad(self.length_histogram, (0, size - len(self.length_histogram))) + \
+            np.pad(other.length_histogram, (0, size - len(other.length_histogram)))
+        for field in COUNT_FIELDS:
+            self.counts[field] = add_counts(self.counts[field], other.counts[field])
+        self.publisher_sentiment = add_counts(self.publisher_sentiment, other.publisher_sentiment)
+        self.phrases.merge(other.phrases)
+        return self
+
+    # Number of rows identical to an earlier row (by content hash), None unless counted
+    def duplicates(self):
+        if not self.count_duplicates:
+            return None
+        if not self.row_hashes:
+            return 0
+        hashes = np.concatenate(self.row_hashes)
+        return len(hashes) - len(np.unique(hashes))
+
+    # Same statistics as Series.describe() on the headline lengths, computed from the histogram
+    def headline_stats(self):
+        values = np.flatnonzero(self.length_histogram)
+        counts = self.length_histogram[values]
+        n = counts.sum()
+        mean = (values * counts).sum() / n
+        std = np.sqrt((counts * (values - mean) ** 2).sum() / (n - 1)) if n > 1 else np.nan
+
+        # Linear interpolation between order statistics, as pandas does
+        cumulative = np.cumsum(counts)
+        def order_statistic(rank):
+            return values[np.searchsorted(cumulative, rank, side='right')]
+        def quantile(q):
+            position = (n - 1) * q
+            lower, upper = int(np.floor(position)), int(np.ceil(position))
+            return order_statistic(lower) + (position - lower) * (order_statistic(upper) - order_statistic(lower))
+
+        stats = [n, mean, std, values.min(), quantile(0.25), quantile(0.5), quantile(0.75), values.max()]
+        # Float64, like describe() of the nullable integer lengths of features.headline_length
+        return pd.Series(np.array(stats, dtype='float64'), index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'],
+                         name='headline_length', dtype='Float64')
+
+    # Article counts for a field, named like the value_counts() Series of analysis.py
+    def value_counts(self, field):
+        return self.counts[field].sort_values(ascending=False, kind='stable').rename('count').rename_axis(field)
+
+    # Proportion of each sentiment label for the top publishers, laid out like analysis.py
+    def publisher_sentiment_table(self, top=10):
+        sentiment_data = pd.DataFrame()
+        for publisher in self.value_counts('publisher').head(top).index:
+            counts = self.publisher_sentiment.loc[publisher].sort_values(ascending=False, kind='stable')
+            sentiment_data[publisher] = (counts / counts.sum()).rename_axis('sentiment_label').rename('proportion')
+        return sentiment_data.T.fillna(0)
+
+    # Print the statistics in the same form as analysis.py
+    def report(self):
+        print(f"The number of rows in the DataFrame is: {self.rows}")
+        print("Missing Values:\n", self.missing)
+        if self.count_duplicates:
+            print("Duplicate Rows:\n", self.duplicates())
+        print("Headline Length Statistics:\n", self.headline_stats())
+        print("\nArticles per Publisher:\n", self.value_counts('publisher'))
+        print("\nPublication Trends Over Time:\n", self.value_counts('date').sort_index())
+        print("Sentiment Distribution:\n", self.value_counts('sentiment_label'))
+        for ngram_range in [(1, 2), (2, 2), (3, 3)]:
+            print("Top 20 Common Phrases (Descending Order):\n", self.phrases.top(20, ngram_range))
+
+        print("Publication Trends by Hour (AM/PM Format) in Descending Order:")
+        for hour_ampm, count in self.value_counts('hour_ampm').items():
+            print(f"{hour_ampm}: {count} articles")
+
+        print("Top Publishers by Number of Articles:")
+        print(self.value_counts('publisher').head(10))
+        print("Sentiment Distribution for Top 10 Publishers:")
+        print(self.publisher_sentiment_table())
+        print("Top Domains by Number of Articles:")
+        print(self.value_counts('publisher_domain').head(10))
+
+
+# Stream the news CSV in chunks and accumulate its aggregate statistics. The sentiment cache
+# file is read before the first chunk and written once after the last.
+def stream_statistics(path=NEWS_PATH, chunksize=CHUNK_SIZE, count_duplicates=False, cache_path=CACHE_PATH,
+                      phrase_capacity=PHRASE_CAPACITY):
+    sentiment_cache = SentimentCache(cache_path)
+    stats = NewsStatistics(count_duplicates, sentiment_cache, phrase_capacity)
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        stats.update(chunk)
+    sentiment_cache.save()
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Aggregate news statistics without loading the whole file")
+    parser.add_argument('path', nargs='?', default=NEWS_PATH)
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--duplicates', action='store_true',
+                        help="also count duplicate rows (keeps an 8-byte hash per row)")
+    args = parser.parse_args()
+    stream_statistics(args.path, args.chunksize, args.duplicates).report()
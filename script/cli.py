@@ -0,0 +1,61 @@
+import argparse
+
+import pandas as pd
+
+from . import instrument
+from .pipeline import PIPELINE_DIR, run_pipeline
+from .stages import ALIASES, STAGES
+
+
+# Print a short summary of one stage's result
+def summarize(name, result):
+    print(f"== {name}")
+    if name == 'correlate':
+        from .correlation import print_correlations
+        print_correlations(result)
+    elif name == 'events':
+        print(result['summary'])
+        print(result['average'])
+    elif name == 'report':
+        print(f"Wrote {len(result)} charts")
+    elif isinstance(result, pd.Series):
+        print(result.describe())
+    else:
+        print(result.head())
+        print(f"[{len(result)} rows x {len(result.columns)} columns]")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run selected stages of the news and stock analysis")
+    parser.add_argument('stages', nargs='+', choices=list(STAGES) + list(ALIASES),
+                        help="stages to run; the stages they depend on run first")
+    parser.add_argument('--news', dest='news_path', help="news CSV")
+    parser.add_argument('--data-dir', help="directory with the *_historical_data.csv price files")
+    parser.add_argument('--start', help="first date to load")
+    parser.add_argument('--end', help="last date to load")
+    parser.add_argument('--tickers', nargs='+', help="only load news for these tickers")
+    parser.add_argument('--events', dest='events_path', help="CSV of extra events (date, name) for the events stage")
+    parser.add_argument('--spike-threshold', type=float, help="z-score of daily article counts that marks a news spike")
+    parser.add_argument('--report-dir', help="where the report stage writes its charts")
+    parser.add_argument('--jobs', dest='n_jobs', type=int, help="worker processes for the report stage")
+    parser.add_argument('--force', nargs='+', default=(), choices=list(STAGES), help="rerun these stages even if cached")
+    parser.add_argument('--no-cache', action='store_true', help="neither read nor store stage results")
+    parser.add_argument('--workers', type=int, help="stages run concurrently at most")
+    parser.add_argument('--run-report', help="write a JSON report of stage timings, memory and counters here")
+    parser.add_argument('--profile', help="write a cProfile capture of each stage to this directory")
+    args = parser.parse_args(argv)
+
+    options = vars(args)
+    names = options.pop('stages')
+    cache_dir = None if options.pop('no_cache') else PIPELINE_DIR
+    with instrument.recording(options.pop('run_report'), options.pop('profile')):
+        results, ran = run_pipeline(names, cache_dir, options.pop('force'), options.pop('workers'), **options)
+    print(f"Ran: {', '.join(ran) or 'nothing (all cached)'}")
+    for name in names:
+        for stage in ALIASES.get(name, (name,)):
+            summarize(stage, results[stage])
+    return results
+
+
+if __name__ == '__main__':
+    main()
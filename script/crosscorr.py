@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+from .panel import build_panel
+
+# Default grid: sentiment leading (positive lag) or trailing (negative lag) returns by up to 5 trading days
+LAGS = range(-5, 6)
+WINDOWS = (20, 60, 250)
+
+# Tickers are processed in column blocks to bound the memory used by the running sums
+BLOCK_SIZE = 512
+
+
+# Lay out two columns of a (Date, Stock, ...) frame as aligned observation-by-ticker matrices
+def pair_panels(merged, x='Daily_Return', y='Sentiment'):
+    tidy, x_matrix, (rows, codes) = build_panel(merged, x)
+    y_matrix = np.full_like(x_matrix, np.nan)
+    y_matrix[rows, codes] = tidy[y].to_numpy(dtype='float64')
+    return tidy, x_matrix, y_matrix, (rows, codes)
+
+
+# Shift every column down by `lag` rows, so row t holds the value from row t - lag
+def shift_rows(matrix, lag):
+    out = np.full_like(matrix, np.nan)
+    if lag > 0:
+        out[lag:] = matrix[:-lag]
+    elif lag < 0:
+        out[:lag] = matrix[-lag:]
+    else:
+        out[:] = matrix
+    return out
+
+
+# Pearson correlation from pair count and the sums of x, y, x^2, y^2 and xy
+def pearson_from_sums(n, sx, sy, sxx, syy, sxy, min_periods=3):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = n * sxy - sx * sy
+        var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        r = np.clip(cov / np.sqrt(var), -1.0, 1.0)
+    r[(n < min_periods) | ~(var > 0)] = np.nan
+    return r
+
+
+# Cumulative sums (with a leading zero row) of the pair count and moments, over pairs where both are present
+def cumulative_moments(x, y):
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, y, 0.0)
+    moments = [valid.astype('float64'), x, y, x * x, y * y, x * y]
+    zero = np.zeros((1, x.shape[1]))
+    return [np.concatenate([zero, np.cumsum(m, axis=0)]) for m in moments]
+
+
+# Centre each column (correlation is shift invariant) to keep the running sums well conditioned
+def _centre(matrix):
+    counts = np.maximum((~np.isnan(matrix)).sum(axis=0), 1)
+    return matrix - np.nansum(matrix, axis=0) / counts
+
+
+# Full-sample correlation of x with y shifted by each lag, one row per ticker and one column per lag
+def lagged_correlation(merged, x='Daily_Return', y='Sentiment', lags=LAGS, method='pearson', min_periods=3):
+    if method not in ('pearson', 'spearman'):
+        raise ValueError(f"Unknown method: {method}")
+    tidy, x_matrix, y_matrix, _ = pair_panels(merged, x, y)
+    x_matrix, y_matrix = _centre(x_matrix), _centre(y_matrix)
+
+    if method == 'spearman':
+        from scipy.stats import rankdata
+    result = np.full((x_matrix.shape[1], len(lags)), np.nan)
+    for j, lag in enumerate(lags):
+        shifted = shift_rows(y_matrix, lag)
+        xs = x_matrix
+        if method == 'spearman':
+            # Rank each ticker's complete pairs, then correlate the ranks
+            valid = ~(np.isnan(xs) | np.isnan(shifted))
+            xs = rankdata(np.where(valid, xs, np.nan), axis=0, nan_policy='omit')
+            shifted = rankdata(np.where(valid, shifted, np.nan), axis=0, nan_policy='omit')
+        sums = [m[-1] for m in cumulative_moments(xs, shifted)]
+        result[:, j] = pearson_from_sums(*sums, min_periods=min_periods)
+
+    stocks = tidy['Stock'].astype('category').cat.categories
+    return pd.DataFrame(result, index=pd.Index(stocks, name='Stock'), columns=pd.Index(list(lags), name='lag'))
+
+
+# Rolling-window correlation of x with lagged y for every (ticker, lag, window) cell.
+# After one O(n) cumulative-sum pass per lag, each window is a difference of two rows.
+def rolling_correlation(merged, x='Daily_Return', y='Sentiment', lags=LAGS, windows=WINDOWS,
+                        min_periods=3, block_size=BLOCK_SIZE):
+    tidy, x_matrix, y_matrix, (rows, codes) = pair_panels(merged, x, y)
+    x_matrix, y_matrix = _centre(x_matrix), _centre(y_matrix)
+    n_rows, n_stocks = x_matrix.shape
+
+    columns = [(window, lag) for window in windows for lag in lags]
+    result = np.full((len(tidy), len(columns)), np.nan, dtype='float32')
+    for start in range(0, n_stocks, block_size):
+        block = slice(start, start + block_size)
+        in_block = (codes >= start) & (codes < start + block_size)
+        block_rows, block_codes = rows[in_block], codes[in_block] - start
+
+        for j, lag in enumerate(lags):
+            sums = cumulative_moments(x_matrix[:, block], shift_rows(y_matrix[:, block], lag))
+            for i, window in enumerate(windows):
+                # Window [t - window + 1, t] (truncated at the start of the history), as in pandas rolling
+                lower = np.maximum(np.arange(1, n_rows + 1) - window, 0)
+                windowed = [m[1:] - m[lower] for m in sums]
+                corr = pearson_from_sums(*windowed, min_periods=min_periods)
+                result[in_block, i * len(lags) + j] = corr[block_rows, block_codes]
+
+    index = pd.MultiIndex.from_arrays([tidy['Stock'], tidy['Date']])
+    return pd.DataFrame(result, index=index, columns=pd.MultiIndex.from_tuples(columns, names=['window', 'lag']))
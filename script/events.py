@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .merge import day_numbers
+
+# Significant market events, by date
+MARKET_EVENTS = {
+    '2009-03-09': 'Recovery from Global Financial Crisis',
+    '2010-05-09': 'European Sovereign Debt Crisis',
+    '2011-08-02': 'US Debt Ceiling Crisis',
+    '2011-12-17': 'Arab Spring',
+    '2013-10-01': 'US Government Shutdown',
+    '2014-06-20': 'Oil Price Crash',
+    '2015-06-12': 'Chinese Stock Market Crash',
+    '2016-06-23': 'Brexit Vote',
+    '2016-11-08': 'US Presidential Election',
+    '2018-07-06': 'US-China Trade War',
+    '2020-03-11': 'COVID-19 Pandemic'
+}
+
+# Trading days before and after the event day in each event window
+PRE_EVENT = 5
+POST_EVENT = 10
+
+# Trading days before each event window that a ticker's normal (expected) return is estimated from
+ESTIMATION_WINDOW = 120
+
+# Days of publication history a day's article count is compared with, and the z-score above
+# which the day counts as a news volume spike
+SPIKE_WINDOW = 30
+SPIKE_THRESHOLD = 3.0
+
+
+# Read events from a CSV with a 'date' column and optionally a 'name' column
+def load_events(path):
+    events = pd.read_csv(path)
+    dates = pd.to_datetime(events['date']).dt.strftime('%Y-%m-%d')
+    names = events['name'].astype(str) if 'name' in events.columns else dates
+    return dict(zip(dates, names))
+
+
+# Combine several {date: name} event lists, joining the names of events on the same date
+def combine_events(*event_lists):
+    combined = {}
+    for events in event_lists:
+        for date, name in events.items():
+            combined[date] = f"{combined[date]}; {name}" if date in combined else name
+    return dict(sorted(combined.items()))
+
+
+# Number of articles per day, like analysis.py's publication trends
+def publication_trends(dates):
+    return dates.dt.date.value_counts().sort_index()
+
+
+# Z-score of each day's article count against the `window` days before it (days without
+# articles count as zero). The window means and variances come from cumulative sums, so the
+# whole series is scored in one linear pass; days with less history than a full window are NaN.
+def volume_zscores(publication_trends, window=SPIKE_WINDOW):
+    counts = pd.Series(publication_trends.to_numpy(), index=pd.to_datetime(publication_trends.index))
+    if len(counts):
+        counts = counts.reindex(pd.date_range(counts.index.min(), counts.index.max(), freq='D'), fill_value=0)
+    x = counts.to_numpy(dtype='float64')
+    sums = np.concatenate([[0.0], np.cumsum(x)])
+    squares = np.concatenate([[0.0], np.cumsum(x * x)])
+
+    # Day i is compared with days [i - window, i)
+    zscores = np.full(len(x), np.nan)
+    end = np.arange(window, len(x))
+    mean = (sums[end] - sums[end - window]) / window
+    variance = (squares[end] - squares[end - window]) / window - mean * mean
+    with np.errstate(invalid='ignore', divide='ignore'):
+        zscores[window:] = np.where(variance > 0, (x[window:] - mean) / np.sqrt(variance), np.nan)
+    return pd.DataFrame({'articles': x.astype(np.int64), 'zscore': zscores}, index=counts.index)
+
+
+# Days whose article count is `threshold` standard deviations above the preceding window, as
+# events; a run of consecutive spike days is reported once, at its first day
+def volume_spikes(publication_trends, window=SPIKE_WINDOW, threshold=SPIKE_THRESHOLD):
+    scores = volume_zscores(publication_trends, window)
+    spike = (scores['zscore'] > threshold).to_numpy()
+    first = spike & ~np.concatenate([[False], spike[:-1]])
+    return {date.strftime('%Y-%m-%d'): f"News spike ({articles} articles, z={zscore:.1f})"
+            for date, articles, zscore in scores[first].itertuples()}
+
+
+# Lay out one column of a (Date, Stock, ...) frame as a day-by-ticker matrix over the union of
+# every ticker's trading days, so a row is the same calendar day for all tickers
+def calendar_panel(merged, column):
+    calendar, rows = np.unique(day_numbers(merged['Date']), return_inverse=True)
+    stock = merged['Stock'].astype('category')
+    matrix = np.full((len(calendar), len(stock.cat.categories)), np.nan)
+    matrix[rows, stock.cat.codes.to_numpy()] = merged[column].to_numpy(dtype='float64')
+    return calendar, stock.cat.categories, matrix
+
+
+# Market-adjusted returns: each ticker's return minus the equal-weighted mean return of all
+# tickers trading that day
+def market_adjusted(returns):
+    present = ~np.isnan(returns)
+    count = present.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        market = np.where(present, returns, 0.0).sum(axis=1, keepdims=True) / count
+    return returns - market
+
+
+# Mean return of every ticker over the `length` trading days before each event window (the
+# constant-mean-return model's expected return), as an (event, ticker) array taken from
+# cumulative sums rather than by averaging each window
+def estimation_means(returns, positions, pre, length=ESTIMATION_WINDOW):
+    present = ~np.isnan(returns)
+    zero = np.zeros((1, returns.shape[1]))
+    sums = np.concatenate([zero, np.cumsum(np.where(present, returns, 0.0), axis=0)])
+    counts = np.concatenate([zero, np.cumsum(present, axis=0)])
+    end = np.clip(positions - pre, 0, len(returns))
+    start = np.maximum(end - length, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sums[end] - sums[start]) / (counts[end] - counts[start])
+
+
+# Rows [position - pre, position + post] of a day-by-ticker matrix for every position, as an
+# (event, ticker, offset) array of strided views into the NaN-padded matrix, copied once by
+# the fancy index. Rows outside the matrix, and every row of events not `inside` it, are NaN.
+def event_windows(matrix, positions, pre, post, inside):
+    padded = np.concatenate([np.full((pre, matrix.shape[1]), np.nan), matrix,
+                             np.full((post + 1, matrix.shape[1]), np.nan)])
+    windows = sliding_window_view(padded, pre + post + 1, axis=0)[positions]
+    windows[~inside] = np.nan
+    return windows
+
+
+# Abnormal returns and daily sentiment of every ticker around each event. Abnormal returns are
+# measured against the ticker's mean return over the estimation window before the event
+# (model='mean') or against the equal-weighted return of all tickers that day (model='market').
+# The event day is the first trading day on or after the event date; events outside the price
+# history are left empty.
+# Returns the per-event summary, the (event, Stock) x offset windows of abnormal returns and
+# sentiment, and the average abnormal return (AAR), its cumulative sum (CAAR) and the average
+# sentiment by offset across all events and tickers.
+def event_study(merged, events, pre=PRE_EVENT, post=POST_EVENT, model='mean', estimation=ESTIMATION_WINDOW,
+                returns='Daily_Return', sentiment='Sentiment'):
+    if model not in ('mean', 'market'):
+        raise ValueError(f"Unknown model: {model}")
+    calendar, stocks, return_matrix = calendar_panel(merged, returns)
+    sentiment_matrix = calendar_panel(merged, sentiment)[2]
+
+    event_days = day_numbers(pd.to_datetime(pd.Series(list(events), dtype=object)))
+    positions = np.searchsorted(calendar, event_days)
+    inside = (positions < len(calendar)) & (event_days >= (calendar[0] if len(calendar) else 0))
+
+    offsets = pd.Index(np.arange(-pre, post + 1), name='offset')
+    index = pd.MultiIndex.from_product([list(events), stocks], names=['event', 'Stock'])
+
+    def frame(windows):
+        return pd.DataFrame(windows.reshape(-1, len(offsets)), index=index, columns=offsets)
+
+    def by_event(values):
+        return values.groupby(level='event', sort=False).mean()
+
+    if model == 'market':
+        abnormal = event_windows(market_adjusted(return_matrix), positions, pre, post, inside)
+    else:
+        abnormal = (event_windows(return_matrix, positions, pre, post, inside)
+                    - estimation_means(return_matrix, positions, pre, estimation)[:, :, np.newaxis])
+    abnormal = frame(abnormal)
+    daily_sentiment = frame(event_windows(sentiment_matrix, positions, pre, post, inside))
+    trading_days = pd.Series(calendar.astype('datetime64[D]')).reindex(positions).where(inside)
+    summary = pd.DataFrame({
+        'name': list(events.values()),
+        'event_day': trading_days.to_numpy(),
+        'tickers': abnormal.notna().any(axis=1).groupby(level='event', sort=False).sum(),
+        'car': by_event(abnormal.sum(axis=1, min_count=1)),
+        'sentiment_before': by_event(daily_sentiment.loc[:, offsets < 0].mean(axis=1)),
+        'sentiment_after': by_event(daily_sentiment.loc[:, offsets >= 0].mean(axis=1)),
+    }, index=pd.Index(list(events), name='event'))
+
+    average = pd.DataFrame({'aar': abnormal.mean(), 'sentiment': daily_sentiment.mean()})
+    average.insert(1, 'caar', average['aar'].cumsum())
+    return {'summary': summary, 'abnormal': abnormal, 'sentiment': daily_sentiment, 'average': average}
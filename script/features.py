@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Hour of the day (0-23) in AM/PM format, indexed by hour
+HOUR_LABELS = ['12 AM'] + [f'{hour} AM' for hour in range(1, 12)] + ['12 PM'] + [f'{hour} PM' for hour in range(1, 12)]
+
+# Calendar names, indexed by pandas' dayofweek (Monday=0) and month - 1
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+          'September', 'October', 'November', 'December']
+
+SENTIMENT_LABELS = ['negative', 'neutral', 'positive']
+
+# Domain part of a publisher given as an email address
+DOMAIN_PATTERN = r'@([\w.-]+)'
+
+
+# Categorical from integer codes into a fixed label table, keeping only the labels that occur
+def _lookup(codes, labels, index=None):
+    codes = np.nan_to_num(np.asarray(codes, dtype='float64'), nan=-1).astype(np.int8)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=labels), index=index).cat.remove_unused_categories()
+
+
+# Number of characters in each headline, as nullable 16-bit integers
+def headline_length(headlines):
+    return headlines.str.len().astype('Int16')
+
+
+# Weekday name of each date, as a categorical
+def day_of_week(dates):
+    return _lookup(dates.dt.dayofweek, WEEKDAYS, dates.index)
+
+
+# Month name of each date, as a categorical
+def month(dates):
+    return _lookup(dates.dt.month - 1, MONTHS, dates.index)
+
+
+# Year of each date, as 16-bit integers
+def publication_year(dates):
+    return dates.dt.year.astype(np.int16)
+
+
+# Hour of the day (0-23) of each date, as 8-bit integers
+def publication_hour(dates):
+    return dates.dt.hour.astype(np.int8)
+
+
+# Hour of the day in AM/PM format, as a categorical
+def hour_ampm(hours):
+    return _lookup(hours, HOUR_LABELS, getattr(hours, 'index', None))
+
+
+# 'positive', 'negative' or 'neutral' for each polarity score, as a categorical
+def sentiment_label(sentiment):
+    values = np.asarray(sentiment, dtype='float64')
+    codes = np.select([values > 0, values < 0], [2, 0], 1)
+    return _lookup(codes, SENTIMENT_LABELS, getattr(sentiment, 'index', None))
+
+
+# Domain of publishers given as email addresses (missing otherwise), as a categorical
+def publisher_domain(publishers):
+    publishers = publishers.astype('category')
+    # Extract once per distinct publisher, then map back through the category codes
+    domains = publishers.cat.categories.to_series().str.extract(DOMAIN_PATTERN, expand=False)
+    codes = publishers.cat.codes.to_numpy()
+    values = np.where(codes >= 0, domains.to_numpy(dtype=object)[codes], np.nan)
+    return pd.Series(values, index=publishers.index, dtype='category')
+
+
+# Add the calendar, time and publisher columns used by analysis.py
+def add_features(data, date='date'):
+    data['headline_length'] = headline_length(data['headline'])
+    data['day_of_week'] = day_of_week(data[date])
+    data['month'] = month(data[date])
+    data['year'] = publication_year(data[date])
+    data['hour'] = publication_hour(data[date])
+    data['hour_ampm'] = hour_ampm(data['hour'])
+    data['publisher_domain'] = publisher_domain(data['publisher'])
+    return data
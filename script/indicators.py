@@ -0,0 +1,248 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import instrument
+from .loader import CACHE_DIR, load_prices, source_fingerprint, stock_symbol
+
+# Where computed indicator series are persisted
+STORE_DIR = os.path.join(os.path.dirname(CACHE_DIR), "indicators")
+
+# Indicators used by the scripts, as (indicator, parameters)
+DEFAULT_INDICATORS = [
+    ('SMA', {'timeperiod': 50}),
+    ('SMA', {'timeperiod': 200}),
+    ('RSI', {'timeperiod': 14}),
+    ('MACD', {'fastperiod': 12, 'slowperiod': 26, 'signalperiod': 9}),
+    ('Daily_Return', {}),
+]
+
+
+# Compute one indicator over a close-price series, returning {column name: values}
+def compute_indicator(close, indicator, params):
+    import talib
+    close = np.asarray(close, dtype='float64')
+    if indicator == 'SMA':
+        return {f"SMA_{params['timeperiod']}": talib.SMA(close, **params)}
+    if indicator == 'EMA':
+        return {f"EMA_{params['timeperiod']}": talib.EMA(close, **params)}
+    if indicator == 'RSI':
+        return {'RSI': talib.RSI(close, **params)}
+    if indicator == 'MACD':
+        macd, signal, hist = talib.MACD(close, **params)
+        return {'MACD': macd, 'MACD_Signal': signal, 'MACD_Hist': hist}
+    if indicator == 'Daily_Return':
+        return {'Daily_Return': pd.Series(close).pct_change().to_numpy()}
+    raise ValueError(f"Unknown indicator: {indicator}")
+
+
+# Encode parameters as a stable file-name fragment, e.g. "fastperiod-12_signalperiod-9"
+def params_key(params):
+    return '_'.join(f"{name}-{params[name]}" for name in sorted(params)) or 'default'
+
+
+# Computes each (ticker, indicator, parameters) series once and keeps it on disk as float32
+class IndicatorStore:
+    def __init__(self, store_dir=STORE_DIR, cache_dir=CACHE_DIR):
+        self.store_dir = store_dir
+        self.cache_dir = cache_dir
+        self._memory = {}
+
+    # Path of the stored series for a key; the source fingerprint is part of the name
+    def _path(self, ticker, indicator, params, fingerprint):
+        name = f"{indicator}__{params_key(params)}__{fingerprint[:16]}.parquet"
+        return os.path.join(self.store_dir, ticker, name)
+
+    # Drop series computed from an older version of the source file
+    def _remove_stale(self, ticker, indicator, params, keep):
+        ticker_dir = os.path.join(self.store_dir, ticker)
+        prefix = f"{indicator}__{params_key(params)}__"
+        for name in os.listdir(ticker_dir):
+            path = os.path.join(ticker_dir, name)
+            if name.startswith(prefix) and path != keep:
+                os.remove(path)
+
+    # Return the indicator columns for a price file, computing and persisting them if needed
+    def get(self, path, indicator, params=None, close=None):
+        params = params or {}
+        ticker = stock_symbol(path)
+        fingerprint = source_fingerprint(path, self.cache_dir)
+        key = (ticker, indicator, params_key(params), fingerprint)
+        if key in self._memory:
+            return self._memory[key]
+
+        store_path = self._path(ticker, indicator, params, fingerprint)
+        if os.path.exists(store_path):
+            instrument.count('indicators.store_hits')
+            values = pd.read_parquet(store_path)
+        else:
+            instrument.count('indicators.computed')
+            if close is None:
+                close = load_prices(path, columns=['Close'], cache_dir=self.cache_dir)['Close']
+            with instrument.stage('talib'):
+                values = pd.DataFrame(compute_indicator(close, indicator, params)).astype('float32')
+            os.makedirs(os.path.dirname(store_path), exist_ok=True)
+            values.to_parquet(store_path + '.tmp', index=False)
+            os.replace(store_path + '.tmp', store_path)
+            self._remove_stale(ticker, indicator, params, keep=store_path)
+
+        self._memory[key] = values
+        return values
+
+    # Load a price file with the requested indicator columns attached
+    def with_indicators(self, path, indicators=DEFAULT_INDICATORS, columns=None):
+        data = load_prices(path, columns=columns, cache_dir=self.cache_dir)
+        for indicator, params in indicators:
+            values = self.get(path, indicator, params, close=data['Close'] if 'Close' in data else None)
+            for name in values.columns:
+                data[name] = values[name].to_numpy()
+        return data
+
+
+# Where the rolling state of each ticker's streaming indicators is kept
+def stream_state_path(ticker, store_dir=STORE_DIR):
+    return os.path.join(store_dir, ticker, "stream_state.json")
+
+
+# Incremental SMA/RSI/MACD/daily returns matching talib's batch output.
+# Appending N bars costs O(N): only the rolling window sums, the Wilder averages
+# for RSI and the EMA states for MACD are carried between calls.
+class IndicatorStream:
+    def __init__(self, sma_periods=(50, 200), rsi_period=14, macd_periods=(12, 26, 9)):
+        self.sma_periods = tuple(sma_periods)
+        self.rsi_period = rsi_period
+        self.macd_periods = tuple(macd_periods)
+        self.count = 0
+        self.prev_close = None
+        # Last max(sma_periods) closes and the running sum of each SMA window
+        self.window = []
+        self.sma_sums = [0.0] * len(self.sma_periods)
+        # RSI: gain/loss totals during warm-up, then Wilder averages
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        # MACD: fast/slow EMAs (seeded like talib, on the bars ending at index slow-1) and signal EMA
+        self.fast_ema = 0.0
+        self.slow_ema = 0.0
+        self.signal_ema = 0.0
+
+    # Process one close price and return its indicator values
+    def _step(self, close):
+        i = self.count
+        row = {}
+
+        # SMA: add the new close, drop the one leaving each window
+        self.window.append(close)
+        for j, period in enumerate(self.sma_periods):
+            self.sma_sums[j] += close
+            if len(self.window) > period:
+                self.sma_sums[j] -= self.window[-period - 1]
+            row[f"SMA_{period}"] = self.sma_sums[j] / period if i >= period - 1 else np.nan
+        if len(self.window) > max(self.sma_periods, default=0):
+            del self.window[0]
+
+        # RSI with Wilder smoothing; the first average is a simple mean of `period` changes
+        n = self.rsi_period
+        row['RSI'] = np.nan
+        if i > 0:
+            change = close - self.prev_close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            if i <= n:
+                self.avg_gain += gain
+                self.avg_loss += loss
+                if i == n:
+                    self.avg_gain /= n
+                    self.avg_loss /= n
+            else:
+                self.avg_gain = (self.avg_gain * (n - 1) + gain) / n
+                self.avg_loss = (self.avg_loss * (n - 1) + loss) / n
+            if i >= n:
+                total = self.avg_gain + self.avg_loss
+                row['RSI'] = 100.0 * self.avg_gain / total if total != 0 else 0.0
+
+        # MACD: talib seeds both EMAs with simple means of the bars ending at index slow-1
+        fast, slow, signal = self.macd_periods
+        k_fast, k_slow, k_signal = 2.0 / (fast + 1), 2.0 / (slow + 1), 2.0 / (signal + 1)
+        if i < slow:
+            self.slow_ema += close
+            if i >= slow - fast:
+                self.fast_ema += close
+            if i == slow - 1:
+                self.slow_ema /= slow
+                self.fast_ema /= fast
+        else:
+            self.fast_ema += (close - self.fast_ema) * k_fast
+            self.slow_ema += (close - self.slow_ema) * k_slow
+
+        row['MACD'] = row['MACD_Signal'] = row['MACD_Hist'] = np.nan
+        if i >= slow - 1:
+            macd = self.fast_ema - self.slow_ema
+            first_signal = slow + signal - 2
+            if i < first_signal:
+                self.signal_ema += macd
+            elif i == first_signal:
+                self.signal_ema = (self.signal_ema + macd) / signal
+            else:
+                self.signal_ema += (macd - self.signal_ema) * k_signal
+            if i >= first_signal:
+                row['MACD'] = macd
+                row['MACD_Signal'] = self.signal_ema
+                row['MACD_Hist'] = macd - self.signal_ema
+
+        row['Daily_Return'] = close / self.prev_close - 1.0 if i > 0 else np.nan
+
+        self.prev_close = close
+        self.count += 1
+        return row
+
+    # Append new close prices, returning one row of indicator values per bar
+    def append(self, closes):
+        rows = [self._step(float(close)) for close in np.asarray(closes, dtype='float64')]
+        return pd.DataFrame(rows, columns=self.columns())
+
+    # Output column names, in the same order as the batch indicators
+    def columns(self):
+        return [f"SMA_{period}" for period in self.sma_periods] + \
+            ['RSI', 'MACD', 'MACD_Signal', 'MACD_Hist', 'Daily_Return']
+
+    # Serialize the rolling state
+    def to_dict(self):
+        state = dict(self.__dict__)
+        state['window'] = list(self.window)
+        state['sma_sums'] = list(self.sma_sums)
+        return state
+
+    # Restore a stream from its serialized state
+    @classmethod
+    def from_dict(cls, state):
+        stream = cls(state['sma_periods'], state['rsi_period'], state['macd_periods'])
+        stream.__dict__.update(state)
+        stream.sma_periods = tuple(state['sma_periods'])
+        stream.macd_periods = tuple(state['macd_periods'])
+        return stream
+
+    # Load a ticker's saved stream, or start a new one
+    @classmethod
+    def load(cls, ticker, store_dir=STORE_DIR, **params):
+        path = stream_state_path(ticker, store_dir)
+        if not os.path.exists(path):
+            return cls(**params)
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    # Persist the rolling state for a ticker
+    def save(self, ticker, store_dir=STORE_DIR):
+        path = stream_state_path(ticker, store_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(path + '.tmp', path)
+
+
+# Append new daily bars for a ticker and persist the updated rolling state
+def append_bars(ticker, closes, store_dir=STORE_DIR):
+    stream = IndicatorStream.load(ticker, store_dir)
+    values = stream.append(closes)
+    stream.save(ticker, store_dir)
+    return values
@@ -0,0 +1,272 @@
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from functools import partial
+
+# Seconds between resident-memory samples
+SAMPLE_INTERVAL = 0.005
+
+# Functions listed per profiled stage in the run report, by cumulative time
+PROFILE_TOP = 15
+
+# The run currently being recorded, if any; stages and counters are no-ops without one
+_report = None
+
+
+# Resident set size of this process in bytes, or None where /proc is unavailable
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# Timing, memory, profile and counter records of one run. Stages nest (a stage opened inside
+# another is recorded as "outer/inner") and are aggregated by name, so a stage entered once per
+# ticker appears once with its number of calls. Memory is the process's resident memory sampled
+# from a background thread, so stages running concurrently see each other's allocations.
+# Stages recorded in worker processes (see map_recorded) are merged in with the worker's memory.
+class RunReport:
+    def __init__(self, profile_dir=None, interval=SAMPLE_INTERVAL):
+        self.profile_dir = profile_dir
+        self.interval = interval
+        self.started = datetime.now(timezone.utc)
+        self.start_time = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.peak_rss = rss_bytes()
+        self._open = {}
+        self._profiling = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._done = threading.Event()
+        self._sampler = None
+        if self.peak_rss is not None:
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self._observe(rss_bytes())
+
+    # Raise the peak of the run and of every open stage to the current resident memory
+    def _observe(self, rss):
+        if rss is None:
+            return
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            for record in self._open.values():
+                record['peak'] = max(record['peak'], rss)
+
+    def _summary(self, path):
+        return self.stages.setdefault(path, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                                             'peak_rss_mb': None, 'peak_added_mb': None})
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    # Add to a counter of a stage; the caller holds the lock
+    def _add_count(self, path, name, n):
+        counters = self._summary(path).setdefault('counters', {})
+        counters[name] = counters.get(name, 0) + n
+
+    # Time (and sample the memory of) a block of work; profiled with cProfile when a profile
+    # directory is set and no other stage is being profiled. Only one profiler can be active in
+    # a process (Python 3.12 refuses a second), so a stage that starts while another thread's
+    # stage is profiled is only timed; pipeline.run_pipeline runs stages one at a time when profiling.
+    @contextmanager
+    def stage(self, name):
+        stack = self._stack()
+        path = '/'.join([entry[0] for entry in stack] + [name])
+        profiler = None
+        if self.profile_dir is not None:
+            with self._lock:
+                if not self._profiling:
+                    self._profiling = True
+                    profiler = cProfile.Profile()
+        stack.append((name, profiler is not None))
+
+        rss = rss_bytes()
+        record = {'start': rss, 'peak': rss or 0}
+        with self._lock:
+            self._open[id(record)] = record
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            self._observe(rss_bytes())
+            with self._lock:
+                del self._open[id(record)]
+                summary = self._summary(path)
+                summary['calls'] += 1
+                summary['seconds'] += seconds
+                summary['max_seconds'] = max(summary['max_seconds'], seconds)
+                if record['start'] is not None:
+                    summary['peak_rss_mb'] = max(summary['peak_rss_mb'] or 0, record['peak'] / 2 ** 20)
+                    summary['peak_added_mb'] = max(summary['peak_added_mb'] or 0,
+                                                   (record['peak'] - record['start']) / 2 ** 20)
+                if profiler is not None:
+                    self._profiling = False
+                    summary['profile'] = self._save_profile(profiler, path, summary['calls'])
+            stack.pop()
+
+    # Write the raw profile next to the report and keep the top functions for the report itself
+    def _save_profile(self, profiler, path, call):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        file_path = os.path.join(self.profile_dir, f"{path.replace('/', '__')}.{call}.prof")
+        profiler.dump_stats(file_path)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        return {'file': file_path, 'top': output.getvalue().strip().splitlines()}
+
+    # Wrap func so that, run on another thread, its stages nest under this thread's current stage
+    def inherit(self, func):
+        parent = list(self._stack())
+
+        def run(*args, **kwargs):
+            stack = self._stack()
+            saved = stack[:]
+            stack[:] = parent
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stack[:] = saved
+        return run
+
+    # Add to a counter, both for the run and for the innermost open stage of this thread
+    def count(self, name, n=1):
+        stack = self._stack()
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+            if stack:
+                self._add_count('/'.join(entry[0] for entry in stack), name, n)
+
+    # Add the stages and counters of a run recorded elsewhere (a task in a worker process) as if
+    # they had been recorded under this thread's current stage
+    def merge(self, stages, counters):
+        prefix = [entry[0] for entry in self._stack()]
+        with self._lock:
+            unattributed = dict(counters)
+            for path, record in stages.items():
+                summary = self._summary('/'.join(prefix + [path]))
+                summary['calls'] += record['calls']
+                summary['seconds'] += record['seconds']
+                summary['max_seconds'] = max(summary['max_seconds'], record['max_seconds'])
+                for key in ['peak_rss_mb', 'peak_added_mb']:
+                    if record[key] is not None:
+                        summary[key] = max(summary[key] or 0, record[key])
+                for name, n in record.get('counters', {}).items():
+                    self._add_count('/'.join(prefix + [path]), name, n)
+                    unattributed[name] -= n
+            for name, n in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + n
+                if prefix and unattributed[name]:
+                    self._add_count('/'.join(prefix), name, unattributed[name])
+
+    def stop(self):
+        self._done.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def to_dict(self):
+        return {
+            'started': self.started.isoformat(),
+            'seconds': time.perf_counter() - self.start_time,
+            'argv': sys.argv,
+            'environment': {'python': platform.python_version(), 'machine': platform.machine(),
+                            'cpus': os.cpu_count(), 'pid': os.getpid()},
+            'peak_rss_mb': None if self.peak_rss is None else self.peak_rss / 2 ** 20,
+            'stages': self.stages,
+            'counters': self.counters,
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+
+# Start recording a run; stage() and count() calls anywhere in the process are recorded from now on
+def start_run(profile_dir=None):
+    global _report
+    _report = RunReport(profile_dir)
+    return _report
+
+
+# Stop recording and write the JSON run report if a path is given
+def finish_run(path=None):
+    global _report
+    report, _report = _report, None
+    if report is None:
+        return None
+    report.stop()
+    if path:
+        report.save(path)
+    return report
+
+
+# Record everything inside the block as one run
+@contextmanager
+def recording(path=None, profile_dir=None):
+    report = start_run(profile_dir)
+    try:
+        yield report
+    finally:
+        finish_run(path)
+
+
+def stage(name):
+    return _report.stage(name) if _report is not None else nullcontext()
+
+
+def inherit(func):
+    return _report.inherit(func) if _report is not None else func
+
+
+def count(name, n=1):
+    if _report is not None:
+        _report.count(name, n)
+
+
+def profiling():
+    return _report is not None and _report.profile_dir is not None
+
+
+# Run func as a run of its own (in a worker process) and return its result with the stages and
+# counters recorded meanwhile
+def _run_recorded(func, *args):
+    report = start_run()
+    try:
+        result = func(*args)
+    finally:
+        finish_run()
+    return result, report.stages, report.counters
+
+
+# executor.map over a process pool that also records the work done in the workers: the stages
+# and counters of each task are merged into the run under the calling thread's current stage
+def map_recorded(executor, func, *iterables, chunksize=1):
+    if _report is None:
+        yield from executor.map(func, *iterables, chunksize=chunksize)
+        return
+    for result, stages, counters in executor.map(partial(_run_recorded, func), *iterables, chunksize=chunksize):
+        _report.merge(stages, counters)
+        yield result
@@ -0,0 +1,268 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import instrument
+
+# Locations of the raw CSVs and the typed Parquet cache built from them, relative to the
+# repository rather than the working directory
+ROOT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+DATA_DIR = os.path.join(ROOT_DIR, "src", "data")
+NEWS_PATH = os.path.join(DATA_DIR, "raw_analysis_ratings.csv")
+PRICE_PATTERN = "*_historical_data.csv"
+COMBINED_PATH = os.path.join(DATA_DIR, "combined_historical_data.csv")
+CACHE_DIR = os.path.join(DATA_DIR, "cache", "parquet")
+
+# The news cache is partitioned by publication year
+NEWS_PARTITIONS = ['year']
+
+# News columns held as categoricals (few distinct values) and as Arrow-backed strings
+NEWS_CATEGORIES = ['publisher', 'stock']
+NEWS_STRINGS = ['headline', 'url']
+STRING_DTYPE = pd.StringDtype('pyarrow')
+
+# Name of the sidecar file recording which source a cache was built from
+META_FILE = "_source.json"
+
+
+# Hash a file's content in blocks so large CSVs are not read into memory at once
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Extract the ticker from a file name such as "AAPL_historical_data.csv"
+def stock_symbol(file_path):
+    return os.path.basename(file_path).split('_')[0]
+
+
+# Parse the news CSV into typed columns
+def read_news_csv(path):
+    with instrument.stage('read_csv'):
+        data = pd.read_csv(path)
+    data.rename(columns={data.columns[0]: 'SNo'}, inplace=True)
+    with instrument.stage('to_datetime'):
+        data['date'] = pd.to_datetime(data['date'], format='ISO8601')
+    data['year'] = data['date'].dt.year
+    return compact_news(data)
+
+
+# Give the news columns present their compact types: categoricals for publishers and tickers,
+# contiguous Arrow strings instead of one Python object per headline and URL, and the smallest
+# integer type for the row number and year
+def compact_news(data):
+    for column in NEWS_CATEGORIES:
+        if column in data.columns and not isinstance(data[column].dtype, pd.CategoricalDtype):
+            data[column] = data[column].astype('category')
+    for column in NEWS_STRINGS:
+        if column in data.columns:
+            data[column] = data[column].astype(STRING_DTYPE)
+    if 'SNo' in data.columns:
+        data['SNo'] = pd.to_numeric(data['SNo'], downcast='integer')
+    if 'year' in data.columns:
+        data['year'] = data['year'].astype(np.int16)
+    return data
+
+
+# Parse a "*_historical_data.csv" price file into typed columns
+def read_price_csv(path):
+    with instrument.stage('read_csv'):
+        data = pd.read_csv(path)
+    with instrument.stage('to_datetime'):
+        data['Date'] = pd.to_datetime(data['Date'])
+    data['Stock'] = pd.Categorical([stock_symbol(path)] * len(data))
+    return data
+
+
+# Path of the Parquet cache for a source file
+def cache_path_for(source_path, cache_dir=CACHE_DIR):
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, name)
+
+
+# Check whether a cache still matches its source (cheap mtime/size check, then content hash)
+def cache_is_fresh(source_path, cache_path):
+    meta_path = os.path.join(cache_path, META_FILE)
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    stat = os.stat(source_path)
+    if meta.get('mtime') == stat.st_mtime and meta.get('size') == stat.st_size:
+        return True
+    if meta.get('hash') != file_hash(source_path):
+        return False
+
+    # The file was touched but not changed: record the new mtime and keep the cache
+    meta.update(mtime=stat.st_mtime, size=stat.st_size)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return True
+
+
+# Convert a source CSV to Parquet, writing to a temporary directory first
+def build_cache(source_path, cache_path, reader, partition_cols=None):
+    stat = os.stat(source_path)
+    frame = reader(source_path)
+
+    tmp_path = cache_path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    if partition_cols:
+        frame.to_parquet(tmp_path, partition_cols=partition_cols, index=False)
+    else:
+        frame.to_parquet(os.path.join(tmp_path, 'part-0.parquet'), index=False)
+
+    meta = {'source': os.path.abspath(source_path), 'mtime': stat.st_mtime,
+            'size': stat.st_size, 'hash': file_hash(source_path)}
+    with open(os.path.join(tmp_path, META_FILE), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.replace(tmp_path, cache_path)
+
+
+# Return the Parquet cache for a source CSV, (re)building it when the source changed
+def ensure_cache(source_path, reader, partition_cols=None, cache_dir=CACHE_DIR):
+    cache_path = cache_path_for(source_path, cache_dir)
+    if cache_is_fresh(source_path, cache_path):
+        instrument.count('parquet.cache_hits')
+        return cache_path
+    instrument.count('parquet.cache_builds')
+    with instrument.stage('csv_to_parquet'):
+        build_cache(source_path, cache_path, reader, partition_cols)
+    return cache_path
+
+
+# Content hash of a source file (a price file unless another reader is given), taken from its
+# (refreshed) Parquet cache metadata
+def source_fingerprint(path, cache_dir=CACHE_DIR, reader=None, partition_cols=None):
+    cache_path = ensure_cache(path, reader or read_price_csv, partition_cols, cache_dir=cache_dir)
+    with open(os.path.join(cache_path, META_FILE)) as f:
+        return json.load(f)['hash']
+
+
+# Convert a date bound to a Timestamp comparable with the given datetime column
+def _as_bound(value, column):
+    value = pd.Timestamp(value)
+    tz = getattr(column.dtype, 'tz', None)
+    if tz is not None and value.tzinfo is None:
+        value = value.tz_localize(tz)
+    elif tz is None and value.tzinfo is not None:
+        value = value.tz_localize(None)
+    return value
+
+
+# Keep rows whose date column falls in [start, end]
+def filter_dates(data, column, start=None, end=None):
+    mask = pd.Series(True, index=data.index)
+    if start is not None:
+        mask &= data[column] >= _as_bound(start, data[column])
+    if end is not None:
+        mask &= data[column] <= _as_bound(end, data[column])
+    return data[mask].reset_index(drop=True) if not mask.all() else data
+
+
+# Read the requested columns from a Parquet cache, dropping helper columns not asked for
+def _read_cache(cache_path, columns, filters, date_column, start, end, hidden=()):
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(list(columns) + ([date_column] if start is not None or end is not None else [])))
+    data = pd.read_parquet(cache_path, columns=read_columns, filters=filters or None)
+    data = filter_dates(data, date_column, start, end)
+
+    drop = [c for c in data.columns if c in hidden or (columns is not None and c not in columns)]
+    return data.drop(columns=drop)
+
+
+# Load the news table from its Parquet cache, optionally restricted by column, date and ticker
+def load_news(path=NEWS_PATH, columns=None, start=None, end=None, tickers=None, cache_dir=CACHE_DIR):
+    cache_path = ensure_cache(path, read_news_csv, partition_cols=NEWS_PARTITIONS, cache_dir=cache_dir)
+
+    # Prune whole year partitions before the exact date filter
+    filters = []
+    if start is not None:
+        filters.append(('year', '>=', pd.Timestamp(start).year))
+    if end is not None:
+        filters.append(('year', '<=', pd.Timestamp(end).year))
+    if tickers is not None:
+        filters.append(('stock', 'in', list(tickers)))
+
+    hidden = () if columns is not None and 'year' in columns else ('year',)
+    data = _read_cache(cache_path, columns, filters, 'date', start, end, hidden)
+    data = compact_news(data)
+    if 'stock' in data.columns and tickers is not None:
+        data['stock'] = data['stock'].cat.remove_unused_categories()
+    instrument.count('news.rows_loaded', len(data))
+    return data
+
+
+# Load one ticker's price history from its Parquet cache
+def load_prices(path, columns=None, start=None, end=None, cache_dir=CACHE_DIR):
+    cache_path = ensure_cache(path, read_price_csv, cache_dir=cache_dir)
+    return _read_cache(cache_path, columns, None, 'Date', start, end)
+
+
+# Find every per-ticker price file, skipping the combined file written by quantitativeAnalysis.py
+def discover_price_files(data_dir=DATA_DIR, pattern=PRICE_PATTERN):
+    paths = sorted(glob.glob(os.path.join(data_dir, pattern)))
+    combined = os.path.basename(COMBINED_PATH)
+    return [path for path in paths if os.path.basename(path) != combined]
+
+
+# Stack per-ticker frames into one frame, allocating each output column exactly once
+def stack_frames(frames, symbols):
+    lengths = np.array([len(frame) for frame in frames], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    columns = [c for c in frames[0].columns if c != 'Stock']
+
+    # Files with differing layouts cannot be copied column by column
+    if any(list(frame.columns) != list(frames[0].columns) for frame in frames[1:]):
+        combined = pd.concat(frames, ignore_index=True)
+        combined['Stock'] = pd.Categorical(np.repeat(symbols, lengths), categories=sorted(set(symbols)))
+        return combined
+
+    combined = {}
+    for column in columns:
+        values = [frame[column].to_numpy() for frame in frames]
+        out = np.empty(offsets[-1], dtype=np.result_type(*values))
+        for value, start, stop in zip(values, offsets[:-1], offsets[1:]):
+            out[start:stop] = value
+        combined[column] = out
+
+    # One integer code per row instead of a repeated ticker string
+    categories = sorted(set(symbols))
+    codes = np.repeat(np.searchsorted(categories, symbols).astype(np.int32), lengths)
+    combined['Stock'] = pd.Categorical.from_codes(codes, categories=categories)
+    return pd.DataFrame(combined)
+
+
+# Load many tickers' price histories concurrently and combine them in a single pass
+def load_all_prices(paths=None, data_dir=DATA_DIR, columns=None, start=None, end=None,
+                    max_workers=None, cache_dir=CACHE_DIR):
+    if paths is None:
+        paths = discover_price_files(data_dir)
+    if len(paths) == 0:
+        raise FileNotFoundError(f"No {PRICE_PATTERN} files found in {data_dir}")
+    if columns is not None:
+        columns = [c for c in columns if c != 'Stock']
+
+    # Parquet and CSV parsing release the GIL, so threads overlap the I/O and decoding
+    with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) + 4)) as executor:
+        frames = list(executor.map(instrument.inherit(
+            lambda path: load_prices(path, columns, start, end, cache_dir).drop(columns='Stock', errors='ignore')),
+            paths))
+
+    combined = stack_frames(frames, [stock_symbol(path) for path in paths])
+    instrument.count('prices.rows_loaded', len(combined))
+    return combined
@@ -0,0 +1,65 @@
+import argparse
+
+import pandas as pd
+
+from .features import add_features, sentiment_label
+from .loader import NEWS_PATH, load_news
+from .sentiment import score_headlines
+
+
+# Bytes held by each column, counting the string and category payloads
+def column_memory(data):
+    return data.memory_usage(deep=True, index=False)
+
+
+# The same table in pandas' default layout: one Python string object per value for text and
+# labels, int64 (float64 where values are missing) and float64 for numbers
+def widened(data):
+    columns = {}
+    for column, values in data.items():
+        if isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(values.dtype):
+            columns[column] = values.astype(object).where(values.notna(), None)
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            columns[column] = values.astype('float64' if values.hasnans else 'int64')
+        elif pd.api.types.is_float_dtype(values.dtype):
+            columns[column] = values.astype('float64')
+        else:
+            columns[column] = values
+    return pd.DataFrame(columns, index=data.index)
+
+
+# Per-column memory of a table before and after compaction, with a total row
+def memory_report(before, after):
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.reindex(before.columns).astype(str),
+        'mb_before': column_memory(before) / 2 ** 20,
+        'mb_after': column_memory(after).reindex(before.columns) / 2 ** 20,
+    })
+    report.loc['total'] = ['', '', report['mb_before'].sum(), report['mb_after'].sum()]
+    report['reduction'] = report['mb_before'] / report['mb_after']
+    return report
+
+
+# The news table as the analysis works with it: loaded, enriched and scored
+def news_working_set(news_path=NEWS_PATH):
+    data = add_features(load_news(news_path))
+    data['sentiment'] = score_headlines(data['headline']).astype('float32')
+    data['sentiment_label'] = sentiment_label(data['sentiment'])
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-column memory of the news table, default vs compact dtypes")
+    parser.add_argument('--news', default=NEWS_PATH, help="news CSV")
+    args = parser.parse_args(argv)
+
+    data = news_working_set(args.news)
+    report = memory_report(widened(data), data)
+    with pd.option_context('display.float_format', '{:.2f}'.format, 'display.max_columns', None, 'display.width', 120):
+        print(report)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+# Columns added by merge_daily_sentiment
+SENTIMENT_COLUMNS = ['Sentiment', 'Positive_Sentiment', 'Negative_Sentiment', 'Articles']
+
+
+# Whole days since the epoch, taken from each timestamp's local calendar date (like .dt.date)
+def day_numbers(dates):
+    dates = pd.Series(dates)
+    if getattr(dates.dtype, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    return pd.to_datetime(dates).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+# Integer ticker codes for both sides of the join, against one shared set of categories
+def ticker_codes(left, right):
+    left = pd.Series(left).astype('category')
+    right = pd.Series(right).astype('category')
+    categories = left.cat.categories.union(right.cat.categories)
+    left_codes = left.cat.set_categories(categories).cat.codes.to_numpy()
+    right_codes = right.cat.set_categories(categories).cat.codes.to_numpy()
+    return left_codes.astype(np.int64), right_codes.astype(np.int64)
+
+
+# Combine ticker code and day number into one sortable int64 key
+def join_keys(codes, days):
+    return (codes << 32) | (days + (1 << 31))
+
+
+# Mean overall, positive-only and negative-only sentiment per key, in a single grouped pass
+def daily_sentiment(keys, sentiment):
+    sentiment = np.asarray(sentiment, dtype='float64')
+    valid = ~np.isnan(sentiment)
+    unique_keys, group = np.unique(keys[valid], return_inverse=True)
+    sentiment = sentiment[valid]
+    n = len(unique_keys)
+
+    positive = sentiment > 0
+    negative = sentiment < 0
+    count = np.bincount(group, minlength=n)
+    positive_count = np.bincount(group, weights=positive, minlength=n)
+    negative_count = np.bincount(group, weights=negative, minlength=n)
+    total = np.bincount(group, weights=sentiment, minlength=n)
+    positive_total = np.bincount(group, weights=np.where(positive, sentiment, 0.0), minlength=n)
+    negative_total = np.bincount(group, weights=np.where(negative, sentiment, 0.0), minlength=n)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        aggregates = {
+            'Sentiment': total / count,
+            'Positive_Sentiment': np.where(positive_count > 0, positive_total / positive_count, np.nan),
+            'Negative_Sentiment': np.where(negative_count > 0, negative_total / negative_count, np.nan),
+            'Articles': count,
+        }
+    return unique_keys, aggregates
+
+
+# Left-join daily sentiment aggregates from the news table onto the price table by (stock, day)
+def merge_daily_sentiment(prices, news, sentiment='Sentiment',
+                          price_on=('Date', 'Stock'), news_on=('date', 'stock')):
+    price_date, price_stock = price_on
+    news_date, news_stock = news_on
+    price_codes, news_codes = ticker_codes(prices[price_stock], news[news_stock])
+
+    news_keys = join_keys(news_codes, day_numbers(news[news_date]))
+    unique_keys, aggregates = daily_sentiment(news_keys, news[sentiment])
+
+    # The aggregated keys are already sorted, so each price row is a binary search away
+    price_keys = join_keys(price_codes, day_numbers(prices[price_date]))
+    if len(unique_keys) == 0:
+        position = np.zeros(len(price_keys), dtype=np.int64)
+        found = np.zeros(len(price_keys), dtype=bool)
+    else:
+        position = np.minimum(np.searchsorted(unique_keys, price_keys), len(unique_keys) - 1)
+        found = unique_keys[position] == price_keys
+
+    merged = prices.copy()
+    for name, values in aggregates.items():
+        fill = 0 if name == 'Articles' else np.nan
+        merged[name] = np.where(found, values[position], fill) if len(values) else np.full(len(prices), fill)
+    return merged
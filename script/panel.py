@@ -0,0 +1,126 @@
+import numpy as np
+
+from . import instrument
+from .indicators import DEFAULT_INDICATORS
+
+
+# Lay out a long (Date, Stock, value) frame as an observation-by-ticker matrix.
+# Row i of column j holds ticker j's i-th bar, so every history starts at row 0 and
+# ragged lengths only leave NaN padding at the bottom of shorter columns.
+def build_panel(prices, value='Close'):
+    prices = prices.sort_values(['Stock', 'Date'], kind='stable').reset_index(drop=True)
+    stock = prices['Stock'].astype('category')
+    codes = stock.cat.codes.to_numpy()
+    counts = np.bincount(codes, minlength=len(stock.cat.categories))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rows = np.arange(len(prices)) - starts[codes]
+
+    matrix = np.full((counts.max() if len(counts) else 0, len(counts)), np.nan)
+    matrix[rows, codes] = prices[value].to_numpy(dtype='float64')
+    return prices, matrix, (rows, codes)
+
+
+# Simple moving average of every column, from cumulative sums. Missing values are summed as
+# zero and counted, so a window containing one is NaN, as in talib.
+def panel_sma(matrix, period):
+    out = np.full_like(matrix, np.nan)
+    if len(matrix) < period:
+        return out
+    valid = ~np.isnan(matrix)
+    zero = np.zeros((1, matrix.shape[1]))
+    csum = np.concatenate([zero, np.cumsum(np.where(valid, matrix, 0.0), axis=0)])
+    count = np.concatenate([zero, np.cumsum(valid, axis=0)])
+    window_sum = csum[period:] - csum[:-period]
+    window_count = count[period:] - count[:-period]
+    out[period - 1:] = np.where(window_count == period, window_sum / period, np.nan)
+    return out
+
+
+# Run x[i] = k * value[i] + (1 - k) * x[i - 1] down every column, starting from `seed` at row `start`
+def _smooth(matrix, k, seed, start):
+    from scipy.signal import lfilter
+    out = np.full_like(matrix, np.nan)
+    out[start] = seed
+    if start + 1 < len(matrix):
+        out[start + 1:] = lfilter([k], [1.0, k - 1.0], matrix[start + 1:], axis=0, zi=((1.0 - k) * seed)[np.newaxis])[0]
+    return out
+
+
+# Exponential moving average seeded, like talib, with the simple mean of rows [start - period + 1, start]
+def panel_ema(matrix, period, start=None):
+    start = period - 1 if start is None else start
+    if len(matrix) <= start:
+        return np.full_like(matrix, np.nan)
+    seed = matrix[start - period + 1:start + 1].mean(axis=0)
+    return _smooth(matrix, 2.0 / (period + 1), seed, start)
+
+
+# Wilder RSI of every column
+def panel_rsi(matrix, period=14):
+    out = np.full_like(matrix, np.nan)
+    if len(matrix) <= period:
+        return out
+    change = np.diff(matrix, axis=0, prepend=np.nan)
+    gain = np.clip(change, 0, None)
+    loss = np.clip(-change, 0, None)
+
+    avg_gain = _smooth(gain, 1.0 / period, gain[1:period + 1].mean(axis=0), period)
+    avg_loss = _smooth(loss, 1.0 / period, loss[1:period + 1].mean(axis=0), period)
+    total = avg_gain + avg_loss
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.where(total != 0, 100.0 * avg_gain / total, 0.0)
+    out[np.isnan(total)] = np.nan
+    return out
+
+
+# MACD line, signal and histogram of every column, aligned like talib.MACD
+def panel_macd(matrix, fastperiod=12, slowperiod=26, signalperiod=9):
+    nan = np.full_like(matrix, np.nan)
+    first = slowperiod + signalperiod - 2
+    if len(matrix) <= first:
+        return nan, nan.copy(), nan.copy()
+
+    # talib seeds both EMAs on the bars ending at index slowperiod - 1
+    macd = panel_ema(matrix, fastperiod, start=slowperiod - 1) - panel_ema(matrix, slowperiod)
+    signal = panel_ema(macd, signalperiod, start=first)
+    macd[:first] = np.nan
+    return macd, signal, macd - signal
+
+
+# Simple daily return of every column
+def panel_returns(matrix):
+    out = np.full_like(matrix, np.nan)
+    out[1:] = matrix[1:] / matrix[:-1] - 1.0
+    return out
+
+
+# Compute one indicator on the panel, returning {column name: matrix}
+def panel_indicator(matrix, indicator, params):
+    if indicator == 'SMA':
+        return {f"SMA_{params['timeperiod']}": panel_sma(matrix, params['timeperiod'])}
+    if indicator == 'EMA':
+        return {f"EMA_{params['timeperiod']}": panel_ema(matrix, params['timeperiod'])}
+    if indicator == 'RSI':
+        return {'RSI': panel_rsi(matrix, params.get('timeperiod', 14))}
+    if indicator == 'MACD':
+        macd, signal, hist = panel_macd(matrix, **params)
+        return {'MACD': macd, 'MACD_Signal': signal, 'MACD_Hist': hist}
+    if indicator == 'Daily_Return':
+        return {'Daily_Return': panel_returns(matrix)}
+    raise ValueError(f"Unknown indicator: {indicator}")
+
+
+# Compute indicators for every ticker at once and return them as one tidy (Date, Stock, ...) frame
+def compute_panel(prices, indicators=DEFAULT_INDICATORS, value='Close'):
+    tidy, matrix, (rows, codes) = build_panel(prices, value)
+    for indicator, params in indicators:
+        with instrument.stage(indicator):
+            for name, values in panel_indicator(matrix, indicator, params).items():
+                tidy[name] = values[rows, codes]
+    instrument.count('indicators.panel_rows', len(tidy))
+    return tidy
+
+
+# Pivot one column of a tidy frame to a date-by-ticker matrix
+def to_wide(tidy, column):
+    return tidy.pivot(index='Date', columns='Stock', values=column)
@@ -0,0 +1,88 @@
+import os
+from collections import Counter
+
+import numpy as np
+
+from . import instrument
+from .workers import process_pool
+
+# Headlines vectorized together; each chunk gets its own sparse document-term matrix
+CHUNK_SIZE = 50_000
+
+# Below this many headlines a process pool costs more than it saves
+MIN_PARALLEL = 200_000
+
+
+# Count every 1- to max_n-gram in a batch of headlines, tokenizing each headline once.
+# Stop words are removed before n-grams are formed, exactly as CountVectorizer does.
+def count_chunk(headlines, max_n=3):
+    from sklearn.feature_extraction.text import CountVectorizer
+    vectorizer = CountVectorizer(stop_words='english', ngram_range=(1, max_n))
+    try:
+        X_count = vectorizer.fit_transform(headlines)
+    except ValueError:
+        # Only stop words (or nothing at all) in this chunk
+        return [Counter() for _ in range(max_n)]
+
+    # Column sums of the sparse matrix; the document-term matrix itself is never densified
+    totals = np.asarray(X_count.sum(axis=0)).ravel()
+    terms = vectorizer.get_feature_names_out()
+    sizes = np.char.count(terms.astype(str), ' ') + 1
+    return [Counter(dict(zip(terms[sizes == n].tolist(), totals[sizes == n].tolist())))
+            for n in range(1, max_n + 1)]
+
+
+# Mergeable unigram/bigram/trigram frequency counts over a stream of headlines.
+# With `capacity` set, each n-gram table keeps only its heaviest terms after every update
+# (a heavy-hitter sketch: memory is bounded and counts of the survivors are lower bounds).
+class PhraseCounter:
+    def __init__(self, max_n=3, capacity=None):
+        self.max_n = max_n
+        self.capacity = capacity
+        self.counts = [Counter() for _ in range(max_n)]
+
+    # Keep only the `capacity` most frequent terms of each n-gram table
+    def _prune(self):
+        if self.capacity is None:
+            return
+        for n, counts in enumerate(self.counts):
+            if len(counts) > self.capacity:
+                self.counts[n] = Counter(dict(counts.most_common(self.capacity)))
+
+    # Fold another set of per-n counts into this one
+    def _add(self, chunk_counts):
+        for counts, chunk in zip(self.counts, chunk_counts):
+            counts.update(chunk)
+        self._prune()
+
+    # Count the phrases in a batch of headlines, in chunks and optionally across a process pool
+    def update(self, headlines, chunk_size=CHUNK_SIZE, n_jobs=1):
+        headlines = [headline for headline in headlines if isinstance(headline, str)]
+        instrument.count('phrases.headlines', len(headlines))
+        chunks = [headlines[i:i + chunk_size] for i in range(0, len(headlines), chunk_size)]
+
+        if n_jobs is None:
+            n_jobs = os.cpu_count() or 1
+        with instrument.stage('count_vectorizer'):
+            if n_jobs > 1 and len(headlines) >= MIN_PARALLEL:
+                with process_pool(n_jobs) as executor:
+                    for chunk_counts in executor.map(count_chunk, chunks, [self.max_n] * len(chunks)):
+                        self._add(chunk_counts)
+            else:
+                for chunk in chunks:
+                    self._add(count_chunk(chunk, self.max_n))
+        return self
+
+    # Combine with a counter built from other headlines
+    def merge(self, other):
+        self._add(other.counts)
+        return self
+
+    # Top-k phrases with n in ngram_range, most frequent first, like CountVectorizer(max_features=k)
+    def top(self, k=20, ngram_range=(1, 1)):
+        low, high = ngram_range
+        candidates = Counter()
+        for n in range(low, high + 1):
+            candidates.update(self.counts[n - 1])
+        ranked = sorted(candidates.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return dict(ranked)
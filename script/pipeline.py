@@ -0,0 +1,142 @@
+import ast
+import hashlib
+import inspect
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from . import instrument
+from .loader import (DATA_DIR, NEWS_PATH, NEWS_PARTITIONS, discover_price_files, file_hash, read_news_csv,
+                    source_fingerprint)
+from .stages import ALIASES, STAGE_MODULES, STAGES, resolve, stage_options
+
+# Where stage results are stored, one directory per stage and one file per content key
+PIPELINE_DIR = os.path.join(DATA_DIR, "cache", "pipeline")
+
+# Directory of the package's modules
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Stages whose results are not stored: loading is already served from the Parquet cache,
+# and the report's output is the files it writes
+UNCACHED = {'news', 'prices', 'report'}
+
+
+# Content hashes of the source files a stage reads besides its inputs
+def source_hashes(name, options):
+    if name == 'news':
+        return [source_fingerprint(options.get('news_path') or NEWS_PATH, reader=read_news_csv,
+                                   partition_cols=NEWS_PARTITIONS)]
+    if name == 'prices':
+        return [source_fingerprint(path) for path in discover_price_files(options.get('data_dir') or DATA_DIR)]
+    if name == 'events' and options.get('events_path'):
+        return [file_hash(options['events_path'])]
+    return []
+
+
+# Package modules a module imports, at the top or inside functions
+def package_imports(module, package_dir=PACKAGE_DIR):
+    with open(os.path.join(package_dir, f"{module}.py")) as f:
+        tree = ast.parse(f.read())
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.level == 1:
+            imported.update([node.module.split('.')[0]] if node.module else [alias.name for alias in node.names])
+    return imported
+
+
+# Hash of the source of every module whose code a stage runs: stages.py, the stage's modules
+# and, transitively, the package modules they import
+def code_hash(name, package_dir=PACKAGE_DIR):
+    modules, pending = {'stages'}, list(STAGE_MODULES[name])
+    while pending:
+        module = pending.pop()
+        if module not in modules:
+            modules.add(module)
+            pending.extend(package_imports(module, package_dir))
+    digest = hashlib.blake2b(digest_size=16)
+    for module in sorted(modules):
+        digest.update(module.encode('utf-8'))
+        with open(os.path.join(package_dir, f"{module}.py"), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# Key of a stage's result: a hash of the code the stage runs, its effective options, the keys of
+# its inputs and, for loading stages, the content of the source files. Equal keys mean equal results.
+def stage_key(name, options, input_keys):
+    func = STAGES[name][0]
+    arguments = inspect.signature(func).bind_partial(**stage_options(func, options))
+    arguments.apply_defaults()
+    content = repr((name, code_hash(name), sorted(arguments.arguments.items()), input_keys,
+                    source_hashes(name, options)))
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def result_path(name, key, cache_dir=PIPELINE_DIR):
+    return os.path.join(cache_dir, name, f"{key}.pkl")
+
+
+def save_result(result, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    pd.to_pickle(result, tmp_path)
+    os.replace(tmp_path, path)
+
+
+# Run one stage function, recorded under the stage's name in the run report (see instrument.py)
+def _run_stage(name, func, args, kwargs):
+    with instrument.stage(name):
+        return func(*args, **kwargs)
+
+
+# Run the requested stages, reusing every stored result whose key is unchanged. A stage only
+# runs when its own result is missing (or forced), and then only its inputs are materialized.
+# Stages run as soon as their inputs are ready, independent ones (sentiment and indicators)
+# concurrently unless the run is profiled (see instrument.RunReport.stage). Returns the results
+# needed for the requested stages by name, and the names run.
+def run_pipeline(names, cache_dir=PIPELINE_DIR, force=(), max_workers=None, **options):
+    order = resolve(names)
+    keys = {}
+    for name in order:
+        keys[name] = stage_key(name, options, [keys[required] for required in STAGES[name][1]])
+
+    def is_stored(name):
+        return (cache_dir is not None and name not in UNCACHED and name not in force
+                and os.path.exists(result_path(name, keys[name], cache_dir)))
+
+    # Walk back from the requested stages, stopping at stored results
+    to_run, to_load, pending = set(), set(), [stage for name in names for stage in ALIASES.get(name, (name,))]
+    while pending:
+        name = pending.pop()
+        if name in to_run or name in to_load:
+            continue
+        if is_stored(name):
+            to_load.add(name)
+        else:
+            to_run.add(name)
+            pending.extend(STAGES[name][1])
+
+    instrument.count('pipeline.cache_hits', len(to_load))
+    instrument.count('pipeline.stages_run', len(to_run))
+    with instrument.stage('load_cached'):
+        results = {name: pd.read_pickle(result_path(name, keys[name], cache_dir)) for name in to_load}
+    remaining = [name for name in order if name in to_run]
+    if instrument.profiling():
+        max_workers = 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while remaining or running:
+            for name in [name for name in remaining if all(r in results for r in STAGES[name][1])]:
+                remaining.remove(name)
+                func, requires = STAGES[name]
+                future = executor.submit(instrument.inherit(_run_stage), name, func, [results[r] for r in requires],
+                                         stage_options(func, options))
+                running[future] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                if cache_dir is not None and name not in UNCACHED:
+                    save_result(results[name], result_path(name, keys[name], cache_dir))
+    return results, [name for name in order if name in to_run]
@@ -0,0 +1,82 @@
+import numpy as np
+
+# Points kept per horizontal pixel: the minimum and maximum of each pixel column
+POINTS_PER_PIXEL = 2
+
+
+# Width of the axes in pixels at the figure's dpi
+def pixel_width(ax):
+    return max(1, int(round(ax.get_window_extent().width)))
+
+
+# Indices of the minimum and maximum of y within each of n_bins equal slices, in x order.
+# The drawn envelope is identical to plotting every point when each slice covers at most one pixel.
+def minmax_indices(y, n_bins):
+    n = len(y)
+    if n <= POINTS_PER_PIXEL * n_bins:
+        return np.arange(n)
+    size = -(-n // n_bins)
+    n_bins = -(-n // size)
+    padded = np.full(n_bins * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_bins, size)
+
+    # NaN (indicator warm-up, padding) never wins; all-NaN slices keep their first point
+    low = np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    high = np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    offsets = np.arange(n_bins) * size
+    indices = np.sort(np.concatenate([offsets + low, offsets + high]))
+    return np.unique(indices[indices < n])
+
+
+# Indices chosen by Largest-Triangle-Three-Buckets: the first and last points plus, in each
+# bucket, the point forming the largest triangle with the previous pick and the next bucket's mean
+def lttb_indices(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        following = y[stop:next_stop]
+        following = following[~np.isnan(following)]
+        mean_x = x[stop:next_stop].mean()
+        mean_y = following.mean() if len(following) else y[previous]
+        area = np.abs((x[previous] - mean_x) * (y[start:stop] - y[previous]) -
+                      (x[previous] - x[start:stop]) * (mean_y - y[previous]))
+        best = start + (np.nanargmax(area) if not np.isnan(area).all() else 0)
+        indices[i + 1] = previous = best
+    return indices
+
+
+# x and y reduced to what the axes can show: min/max per pixel column, or LTTB with the same point budget
+def decimate(ax, x, y, method='minmax'):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype='float64')
+    width = pixel_width(ax)
+    if method == 'minmax':
+        indices = minmax_indices(y, width)
+    elif method == 'lttb':
+        indices = lttb_indices(x.astype('datetime64[ns]').astype(np.int64) if x.dtype.kind == 'M' else x, y,
+                               POINTS_PER_PIXEL * width)
+    else:
+        raise ValueError(f"Unknown decimation method: {method}")
+    return x[indices], y[indices]
+
+
+# Line plot of a series of any length with a roughly constant number of points
+def plot_line(ax, x, y, method='minmax', **kwargs):
+    return ax.plot(*decimate(ax, x, y, method), **kwargs)
+
+
+# Histogram (e.g. MACD) drawn as one filled collection around zero instead of one bar patch per point
+def plot_histogram(ax, x, y, method='minmax', **kwargs):
+    x, y = decimate(ax, x, y, method)
+    return ax.fill_between(x, 0, np.nan_to_num(y), step='mid', **kwargs)
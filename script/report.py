@@ -0,0 +1,185 @@
+import argparse
+import os
+
+import matplotlib
+import pandas as pd
+from matplotlib.figure import Figure
+
+from . import instrument
+from .events import MARKET_EVENTS
+from .indicators import STORE_DIR, IndicatorStore
+from .loader import CACHE_DIR, DATA_DIR, NEWS_PATH, ROOT_DIR, discover_price_files, load_all_prices, load_news, stock_symbol
+from .panel import compute_panel
+from .plotting import plot_histogram, plot_line
+from .workers import process_pool
+
+# Where the batch report is written
+REPORT_DIR = os.path.join(ROOT_DIR, "reports")
+
+FIGSIZE = (14, 8)
+DPI = 100
+
+# Below this many tickers a process pool costs more than it saves
+MIN_PARALLEL = 4
+
+# Combined charts get a legend only up to this many tickers
+MAX_LEGEND = 20
+
+# Colors of the market event markers on the publication trends (events listed in events.py)
+EVENT_COLORS = ['red', 'blue', 'green', 'orange', 'purple', 'brown', 'pink', 'gray', 'olive', 'cyan', 'magenta']
+
+
+# Close price with its 50- and 200-day moving averages
+def plot_price(ax, data, stock_symbol):
+    plot_line(ax, data['Date'], data['Close'], label='Close Price')
+    plot_line(ax, data['Date'], data['SMA_50'], label='50-Day SMA')
+    plot_line(ax, data['Date'], data['SMA_200'], label='200-Day SMA')
+    ax.set_title(f'{stock_symbol} Stock Price with Moving Averages')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Price')
+    ax.legend()
+
+
+# RSI with the 70/30 overbought and oversold levels
+def plot_rsi(ax, data, stock_symbol):
+    plot_line(ax, data['Date'], data['RSI'], label='RSI')
+    ax.axhline(70, color='red', linestyle='--')
+    ax.axhline(30, color='green', linestyle='--')
+    ax.set_title(f'{stock_symbol} RSI')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('RSI')
+    ax.legend()
+
+
+# MACD and signal lines over the histogram (one filled collection rather than a bar per day)
+def plot_macd(ax, data, stock_symbol):
+    plot_line(ax, data['Date'], data['MACD'], label='MACD')
+    plot_line(ax, data['Date'], data['MACD_Signal'], label='MACD Signal')
+    plot_histogram(ax, data['Date'], data['MACD_Hist'], label='MACD Histogram')
+    ax.set_title(f'{stock_symbol} MACD')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('MACD')
+    ax.legend()
+
+
+TICKER_CHARTS = {'price': plot_price, 'rsi': plot_rsi, 'macd': plot_macd}
+
+
+# One indicator column for every ticker; stock_data maps symbol -> (data, color)
+def plot_combined(ax, stock_data, column, title, ylabel, label):
+    for stock_symbol, (data, color) in stock_data.items():
+        plot_line(ax, data['Date'], data[column], label=f'{stock_symbol} {label}', color=color)
+    if column == 'RSI':
+        ax.axhline(70, color='red', linestyle='--')
+        ax.axhline(30, color='green', linestyle='--')
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel(ylabel)
+    if len(stock_data) <= MAX_LEGEND:
+        ax.legend()
+
+
+COMBINED_CHARTS = {
+    'sma_50': ('SMA_50', '50-Day Moving Averages for All Stocks', '50-Day SMA', '50-Day SMA'),
+    'rsi': ('RSI', 'RSI for All Stocks', 'RSI', 'RSI'),
+    'macd': ('MACD', 'MACD for All Stocks', 'MACD', 'MACD'),
+    'daily_return': ('Daily_Return', 'Daily Returns for All Stocks', 'Daily Return', 'Daily Return'),
+}
+
+
+# Number of articles per day, optionally with the market events marked
+def plot_publication_trends(ax, publication_trends, market_events=None):
+    plot_line(ax, pd.to_datetime(publication_trends.index), publication_trends.to_numpy())
+    title = 'Publication Trends Over Time'
+    if market_events:
+        for i, (event_date, event_name) in enumerate(market_events.items()):
+            ax.axvline(pd.to_datetime(event_date), color=EVENT_COLORS[i % len(EVENT_COLORS)], linestyle='--',
+                       label=event_name)
+        ax.legend()
+        title += ' with Market Events'
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Number of Articles')
+
+
+# Draw on a fresh figure and write it to disk. Figures made this way are not registered with
+# pyplot, so no window is opened and nothing accumulates across the hundreds of charts of a report.
+def save_chart(path, draw, *args, dpi=DPI):
+    with instrument.stage('plotting'):
+        fig = Figure(figsize=FIGSIZE)
+        draw(fig.add_subplot(), *args)
+        fig.savefig(path, dpi=dpi)
+    instrument.count('report.charts')
+    return path
+
+
+# Render the price, RSI and MACD charts of one ticker into the report directory
+def render_ticker(file_path, report_dir=REPORT_DIR, store_dir=STORE_DIR, cache_dir=CACHE_DIR, fmt='png', dpi=DPI):
+    data = IndicatorStore(store_dir, cache_dir).with_indicators(file_path)
+    symbol = stock_symbol(file_path)
+    ticker_dir = os.path.join(report_dir, 'tickers')
+    os.makedirs(ticker_dir, exist_ok=True)
+    return [save_chart(os.path.join(ticker_dir, f"{symbol}_{name}.{fmt}"), draw, data, symbol, dpi=dpi)
+            for name, draw in TICKER_CHARTS.items()]
+
+
+def _render_ticker(args):
+    return render_ticker(*args)
+
+
+# Render every ticker's charts, spread across a process pool when there are enough of them
+def render_tickers(file_paths, report_dir=REPORT_DIR, n_jobs=None, store_dir=STORE_DIR, cache_dir=CACHE_DIR,
+                   fmt='png', dpi=DPI):
+    tasks = [(path, report_dir, store_dir, cache_dir, fmt, dpi) for path in file_paths]
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+
+    if n_jobs <= 1 or len(tasks) < MIN_PARALLEL:
+        return [path for task in tasks for path in _render_ticker(task)]
+
+    with process_pool(min(n_jobs, len(tasks))) as executor:
+        return [path for paths in instrument.map_recorded(executor, _render_ticker, tasks,
+                                                          chunksize=max(1, len(tasks) // (4 * n_jobs)))
+                for path in paths]
+
+
+# Render the all-tickers indicator charts from the indicator panel (see panel.compute_panel)
+def render_combined(panel, report_dir=REPORT_DIR, fmt='png', dpi=DPI):
+    stock_data = {stock_symbol: (data, None) for stock_symbol, data in panel.groupby('Stock', observed=True)}
+    os.makedirs(report_dir, exist_ok=True)
+    return [save_chart(os.path.join(report_dir, f"combined_{name}.{fmt}"), plot_combined, stock_data, *chart, dpi=dpi)
+            for name, chart in COMBINED_CHARTS.items()]
+
+
+# Render the publication trends, with and without the market events
+def render_publication_trends(news, report_dir=REPORT_DIR, fmt='png', dpi=DPI):
+    publication_trends = news['date'].dt.date.value_counts().sort_index()
+    os.makedirs(report_dir, exist_ok=True)
+    return [save_chart(os.path.join(report_dir, f"publication_trends.{fmt}"), plot_publication_trends,
+                       publication_trends, dpi=dpi),
+            save_chart(os.path.join(report_dir, f"publication_trends_events.{fmt}"), plot_publication_trends,
+                       publication_trends, MARKET_EVENTS, dpi=dpi)]
+
+
+# Render the whole report without opening any window
+def render_report(data_dir=DATA_DIR, news_path=NEWS_PATH, report_dir=REPORT_DIR, n_jobs=None, fmt='png', dpi=DPI):
+    file_paths = discover_price_files(data_dir)
+    written = render_tickers(file_paths, report_dir, n_jobs, fmt=fmt, dpi=dpi)
+    written += render_combined(compute_panel(load_all_prices(file_paths)), report_dir, fmt, dpi)
+    if news_path and os.path.exists(news_path):
+        written += render_publication_trends(load_news(news_path, columns=['date']), report_dir, fmt, dpi)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render every chart to files without a display")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--news', default=NEWS_PATH)
+    parser.add_argument('--out', default=REPORT_DIR)
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes for the per-ticker charts")
+    parser.add_argument('--format', default='png')
+    parser.add_argument('--dpi', type=int, default=DPI)
+    args = parser.parse_args()
+    matplotlib.use('Agg')
+    written = render_report(args.data_dir, args.news, args.out, args.jobs, args.format, args.dpi)
+    print(f"Wrote {len(written)} charts to {args.out}")
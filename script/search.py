@@ -0,0 +1,199 @@
+import argparse
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from .loader import CACHE_DIR, DATA_DIR, NEWS_PARTITIONS, NEWS_PATH, load_news, read_news_csv, source_fingerprint
+
+# Where the search index is stored
+INDEX_PATH = os.path.join(DATA_DIR, "cache", "search.sqlite")
+
+# Words of a headline, as indexed and as matched by a keyword query
+TOKEN_PATTERN = r"\w+"
+
+# News columns stored in the index
+COLUMNS = ['SNo', 'headline', 'url', 'publisher', 'date', 'stock']
+
+# Version of the layout below; an index file in another layout is rebuilt from scratch
+SCHEMA_VERSION = 2
+
+# Indexed archives, and their articles keyed by (archive, row number) with a hash of the row's
+# content, a local calendar day column for date-range queries, (stock, day) and (publisher, day)
+# indexes, and an inverted index from each lowercased word to the articles whose headline contains it
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (id INTEGER PRIMARY KEY, path TEXT UNIQUE, hash TEXT);
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY, source INTEGER, sno INTEGER, hash INTEGER,
+    headline TEXT, url TEXT, publisher TEXT, date TEXT, day TEXT, stock TEXT, UNIQUE (source, sno));
+CREATE INDEX IF NOT EXISTS articles_stock_day ON articles (stock, day);
+CREATE INDEX IF NOT EXISTS articles_publisher_day ON articles (publisher, day);
+CREATE INDEX IF NOT EXISTS articles_day ON articles (day);
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT, article INTEGER, PRIMARY KEY (token, article)) WITHOUT ROWID;
+"""
+
+
+def connect(index_path=INDEX_PATH):
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+    connection = sqlite3.connect(index_path)
+    if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        connection.executescript("DROP TABLE IF EXISTS sources; DROP TABLE IF EXISTS articles; "
+                                 "DROP TABLE IF EXISTS tokens;")
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# Lowercased words of each text
+def tokenize(texts):
+    return pd.Series(texts).str.lower().str.findall(TOKEN_PATTERN)
+
+
+# (token, article) postings of headlines, sorted by word so the inverted index is appended to
+# rather than inserted into at random
+def postings(headlines, ids):
+    tokens = pd.DataFrame({'token': tokenize(headlines).to_numpy(), 'article': np.asarray(ids, dtype=np.int64)})
+    return tokens.explode('token').dropna().drop_duplicates().sort_values(['token', 'article'])
+
+
+# Hash of each news row's indexed content, as a signed 64-bit SQLite integer
+def row_hashes(news):
+    return pd.util.hash_pandas_object(news[COLUMNS[1:]], index=False).to_numpy().view(np.int64)
+
+
+# Add news rows (with the columns in COLUMNS) of one archive to the index
+def add_articles(connection, source, news):
+    start = connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM articles").fetchone()[0]
+    articles = pd.DataFrame({
+        'id': np.arange(start, start + len(news), dtype=np.int64),
+        'source': source,
+        'sno': news['SNo'].to_numpy(dtype=np.int64),
+        'hash': row_hashes(news),
+        'headline': news['headline'].astype(object).to_numpy(),
+        'url': news['url'].astype(object).to_numpy(),
+        'publisher': news['publisher'].astype(object).to_numpy(),
+        'date': news['date'].astype(str).to_numpy(),
+        'day': news['date'].dt.strftime('%Y-%m-%d').to_numpy(),
+        'stock': news['stock'].astype(object).to_numpy(),
+    })
+    articles = articles.astype(object).where(articles.notna(), None)
+    tokens = postings(news['headline'], articles['id'])
+    connection.executemany("INSERT INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           articles.itertuples(index=False, name=None))
+    connection.executemany("INSERT INTO tokens VALUES (?, ?)", tokens.itertuples(index=False, name=None))
+    return len(articles)
+
+
+# Remove indexed articles (with their id and headline) and their postings from the index
+def remove_articles(connection, articles):
+    connection.executemany("DELETE FROM tokens WHERE token = ? AND article = ?",
+                           postings(articles['headline'], articles['id']).itertuples(index=False, name=None))
+    connection.executemany("DELETE FROM articles WHERE id = ?", ((int(i),) for i in articles['id']))
+    return len(articles)
+
+
+# Bring the index up to date with a news archive. Nothing is read while the archive is
+# unchanged; otherwise the archive's rows are compared with the indexed ones by row number and
+# content hash, so appended rows are added, edited rows re-indexed and deleted rows removed.
+# Returns the number of rows added or re-indexed and the number removed.
+def update_index(news_path=NEWS_PATH, index_path=INDEX_PATH, cache_dir=CACHE_DIR):
+    path = os.path.abspath(news_path)
+    fingerprint = source_fingerprint(news_path, cache_dir, reader=read_news_csv, partition_cols=NEWS_PARTITIONS)
+    with closing(connect(index_path)) as connection:
+        stored = connection.execute("SELECT id, hash FROM sources WHERE path = ?", (path,)).fetchone()
+        if stored is not None and stored[1] == fingerprint:
+            return 0, 0
+
+        news = load_news(news_path, columns=COLUMNS, cache_dir=cache_dir)
+        with connection:
+            if stored is None:
+                source = connection.execute("INSERT INTO sources (path) VALUES (?)", (path,)).lastrowid
+            else:
+                source = stored[0]
+            indexed = pd.read_sql_query("SELECT id, sno, hash, headline FROM articles WHERE source = ?",
+                                        connection, params=(source,))
+            # Positions of the indexed rows in the archive (-1 for rows deleted from it)
+            hashes, numbers = row_hashes(news), pd.Index(news['SNo'].to_numpy(dtype=np.int64))
+            positions = numbers.get_indexer(indexed['sno'])
+            deleted = positions < 0
+            unchanged = ~deleted
+            unchanged[~deleted] = hashes[positions[~deleted]] == indexed['hash'].to_numpy()[~deleted]
+            remove_articles(connection, indexed[~unchanged])
+            added = add_articles(connection, source, news[~numbers.isin(indexed['sno'][unchanged])])
+            connection.execute("UPDATE sources SET hash = ? WHERE id = ?", (fingerprint, source))
+        # Refresh the statistics the query planner picks indexes by
+        connection.execute("ANALYZE")
+    return added, int(deleted.sum())
+
+
+# Number of articles whose headline contains a word
+def document_frequency(connection, word):
+    return connection.execute("SELECT COUNT(*) FROM tokens WHERE token = ?", (word,)).fetchone()[0]
+
+
+# Articles whose headline contains every word of `keywords`, optionally only for one ticker and
+# publisher and between two days (inclusive), newest first. Served from the index alone: a
+# ticker or publisher query walks its (stock, day) or (publisher, day) index and looks each
+# article's words up in the inverted index; a keyword query starts from the articles of its
+# rarest word instead.
+def search(keywords=None, stock=None, publisher=None, start=None, end=None, limit=None, index_path=INDEX_PATH):
+    words = sorted(set(tokenize([keywords or ''])[0]))
+    with closing(connect(index_path)) as connection:
+        source, conditions, parameters = "articles", [], []
+        if words and stock is None and publisher is None:
+            rarest = min(words, key=lambda word: document_frequency(connection, word))
+            words.remove(rarest)
+            source = "tokens JOIN articles ON articles.id = tokens.article"
+            conditions.append("token = ?")
+            parameters.append(rarest)
+        for word in words:
+            conditions.append("EXISTS (SELECT 1 FROM tokens WHERE token = ? AND article = articles.id)")
+            parameters.append(word)
+        for column, value in [('stock', stock), ('publisher', publisher)]:
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if start is not None:
+            conditions.append("day >= ?")
+            parameters.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            conditions.append("day <= ?")
+            parameters.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+
+        query = f"SELECT sno AS SNo, headline, url, publisher, date, stock FROM {source}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY day DESC, sno DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(query, connection, params=parameters)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the news headlines by keyword, ticker, publisher and date")
+    parser.add_argument('keywords', nargs='*', help="words every matching headline contains")
+    parser.add_argument('--stock', help="only this ticker")
+    parser.add_argument('--publisher', help="only this publisher")
+    parser.add_argument('--start', help="first day")
+    parser.add_argument('--end', help="last day")
+    parser.add_argument('--limit', type=int, default=20, help="most recent matches shown")
+    parser.add_argument('--news', default=NEWS_PATH, help="news CSV the index is kept up to date with")
+    parser.add_argument('--index', default=INDEX_PATH, help="index file")
+    args = parser.parse_args(argv)
+
+    added, removed = update_index(args.news, args.index)
+    if added or removed:
+        print(f"Indexed {added} new or edited articles, removed {removed}")
+    start_time = time.perf_counter()
+    results = search(' '.join(args.keywords), args.stock, args.publisher, args.start, args.end, args.limit, args.index)
+    print(results.to_string(index=False))
+    print(f"{len(results)} articles in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+    return results
+
+
+if __name__ == '__main__':
+    main()
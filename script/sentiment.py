@@ -0,0 +1,124 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import instrument
+from .loader import DATA_DIR
+from .workers import process_pool
+
+# Default location of the on-disk polarity cache
+CACHE_PATH = os.path.join(DATA_DIR, "cache", "sentiment_cache.pkl")
+
+# Below this many unique headlines a process pool costs more than it saves
+MIN_PARALLEL = 20000
+
+
+# Score a list of headlines with TextBlob (runs inside the worker processes)
+def _score_chunk(texts):
+    from textblob import TextBlob
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+# Hash each headline to a stable 64-bit key so the cache does not store the text
+def hash_headlines(texts):
+    keys = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+        keys[i] = int.from_bytes(digest, 'little', signed=True)
+    return keys
+
+
+# Load the cached polarity scores, indexed by headline hash
+def load_cache(cache_path=CACHE_PATH):
+    if cache_path and os.path.exists(cache_path):
+        return pd.read_pickle(cache_path)
+    return pd.Series(dtype='float64', index=pd.Index([], dtype='int64'))
+
+
+# Persist the polarity scores to disk
+def save_cache(cache, cache_path=CACHE_PATH):
+    if not cache_path:
+        return
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    cache.to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+# The polarity cache held in memory across several score_headlines calls: read from disk once,
+# added to by each call and written back once by save() (see chunked.stream_statistics). Without
+# a cache path nothing is kept between calls.
+class SentimentCache:
+    def __init__(self, cache_path=CACHE_PATH):
+        self.cache_path = cache_path
+        scores = load_cache(cache_path)
+        self.scores = scores[~scores.index.duplicated()]
+        self.added = {}
+
+    # Cached score of each headline hash, NaN where there is none
+    def lookup(self, keys):
+        scores = self.scores.reindex(keys).to_numpy(dtype='float64', copy=True)
+        missing = np.flatnonzero(np.isnan(scores))
+        if self.added and len(missing):
+            scores[missing] = [self.added.get(key, np.nan) for key in keys[missing].tolist()]
+        return scores
+
+    def add(self, keys, scores):
+        if self.cache_path:
+            self.added.update(zip(keys.tolist(), scores))
+
+    def save(self):
+        if self.added:
+            save_cache(pd.concat([self.scores, pd.Series(self.added, dtype='float64')]), self.cache_path)
+
+
+# Score unique headlines, in parallel chunks across a process pool when worthwhile
+def _score_unique(texts, n_jobs, chunk_size):
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1 or len(texts) < MIN_PARALLEL:
+        return _score_chunk(texts)
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    scores = []
+    with process_pool(n_jobs) as executor:
+        for chunk_scores in executor.map(_score_chunk, chunks):
+            scores.extend(chunk_scores)
+    return scores
+
+
+# Compute TextBlob polarity for every headline, scoring each distinct text only once. The scores
+# are looked up in and added to `cache` when one is given, else in the cache file, which is
+# rewritten when headlines were scored.
+def score_headlines(headlines, cache_path=CACHE_PATH, n_jobs=None, chunk_size=5000, cache=None):
+    headlines = pd.Series(headlines)
+
+    # Deduplicate: syndicated stories share the exact same headline
+    codes, uniques = pd.factorize(headlines)
+    uniques = list(uniques)
+    keys = hash_headlines(uniques)
+
+    # Look up what is already cached
+    persist = cache is None
+    if persist:
+        cache = SentimentCache(cache_path)
+    unique_scores = cache.lookup(keys)
+
+    # Score the remainder and add it to the cache
+    missing = np.flatnonzero(np.isnan(unique_scores))
+    instrument.count('sentiment.headlines', len(headlines))
+    instrument.count('sentiment.cache_hits', len(uniques) - len(missing))
+    instrument.count('sentiment.headlines_scored', len(missing))
+    if len(missing) > 0:
+        with instrument.stage('textblob'):
+            new_scores = _score_unique([uniques[i] for i in missing], n_jobs, chunk_size)
+        unique_scores[missing] = new_scores
+        cache.add(keys[missing], np.asarray(new_scores, dtype='float64'))
+        if persist:
+            cache.save()
+
+    # Broadcast back to the original rows (missing headlines stay NaN)
+    scores = np.append(unique_scores, np.nan)[codes]
+    return pd.Series(scores, index=headlines.index, name='sentiment')
@@ -0,0 +1,146 @@
+import inspect
+
+from .crosscorr import LAGS, WINDOWS, lagged_correlation, rolling_correlation
+from .events import (MARKET_EVENTS, POST_EVENT, PRE_EVENT, SPIKE_THRESHOLD, combine_events, event_study, load_events,
+                    publication_trends, volume_spikes)
+from .features import add_features
+from .indicators import DEFAULT_INDICATORS
+from .loader import DATA_DIR, NEWS_PATH, discover_price_files, load_all_prices, load_news
+from .merge import merge_daily_sentiment
+from .panel import compute_panel
+from .sentiment import score_headlines
+
+# The analysis as a set of stages. Each stage is a plain function of the results of the stages
+# it requires plus keyword options. Heavy dependencies (talib, gensim, sklearn, textblob,
+# matplotlib) are only imported when a stage actually uses them, so importing this is cheap.
+
+
+# Load the news articles from the typed Parquet cache
+def load_news_data(news_path=NEWS_PATH, news_columns=None, start=None, end=None, tickers=None):
+    return load_news(news_path, columns=news_columns, start=start, end=end, tickers=tickers)
+
+
+# Load and combine every price file in the data directory
+def load_price_data(data_dir=DATA_DIR, start=None, end=None):
+    return load_all_prices(discover_price_files(data_dir), start=start, end=end)
+
+
+# Calendar, time and publisher columns of the news
+def enrich(news):
+    return add_features(news.copy())
+
+
+# Polarity of each headline as float32, aligned with the news
+def score_sentiment(news, lowercase=False):
+    headlines = news['headline'].str.lower() if lowercase else news['headline']
+    return score_headlines(headlines).astype('float32').rename('Sentiment')
+
+
+# SMA, RSI, MACD and daily returns for every ticker in one vectorized pass
+def compute_indicators(prices, indicators=DEFAULT_INDICATORS):
+    return compute_panel(prices, indicators)
+
+
+# Same-day correlation between daily returns and one sentiment column for each stock
+def same_day_correlation(merged, column):
+    correlation = lagged_correlation(merged, y=column, lags=[0], min_periods=2)[0]
+    return correlation.dropna().rename(None)
+
+
+# Daily overall, positive-only and negative-only sentiment joined to each ticker's trading days
+def merge_sentiment(news, sentiment, panel):
+    return merge_daily_sentiment(panel, news[['date', 'stock']].assign(Sentiment=sentiment))
+
+
+# Same-day, lagged and rolling correlation between daily returns and daily sentiment
+def correlate(merged, lags=LAGS, windows=WINDOWS):
+    return {
+        'overall': same_day_correlation(merged, 'Sentiment'),
+        'positive': same_day_correlation(merged, 'Positive_Sentiment'),
+        'negative': same_day_correlation(merged, 'Negative_Sentiment'),
+        'lagged': lagged_correlation(merged, lags=lags),
+        'rolling': rolling_correlation(merged, lags=lags, windows=windows),
+    }
+
+
+# Abnormal returns and sentiment around the market events, the events listed in a CSV file and
+# the detected news volume spikes (see events.py)
+def study_events(news, merged, events_path=None, spike_threshold=SPIKE_THRESHOLD, pre=PRE_EVENT, post=POST_EVENT):
+    events = combine_events(MARKET_EVENTS, load_events(events_path) if events_path else {},
+                            volume_spikes(publication_trends(news['date']), threshold=spike_threshold))
+    return event_study(merged, events, pre, post)
+
+
+# Render every chart to the report directory without a display
+def write_report(news, panel, data_dir=DATA_DIR, report_dir=None, n_jobs=None):
+    from .report import REPORT_DIR, render_combined, render_publication_trends, render_tickers
+    report_dir = report_dir or REPORT_DIR
+    written = render_tickers(discover_price_files(data_dir), report_dir, n_jobs)
+    written += render_combined(panel, report_dir)
+    written += render_publication_trends(news, report_dir)
+    return written
+
+
+# Stage name -> (function, names of the stages whose results it takes, in order)
+STAGES = {
+    'news': (load_news_data, ()),
+    'prices': (load_price_data, ()),
+    'enrich': (enrich, ('news',)),
+    'sentiment': (score_sentiment, ('news',)),
+    'indicators': (compute_indicators, ('prices',)),
+    'merge': (merge_sentiment, ('news', 'sentiment', 'indicators')),
+    'correlate': (correlate, ('merge',)),
+    'events': (study_events, ('news', 'merge')),
+    'report': (write_report, ('news', 'indicators')),
+}
+
+# Package modules holding the code each stage runs besides its wrapper here. Their source, with
+# that of every package module they import and of this module, is part of the stage's cache key.
+STAGE_MODULES = {
+    'news': ('loader',),
+    'prices': ('loader',),
+    'enrich': ('features',),
+    'sentiment': ('sentiment',),
+    'indicators': ('panel',),
+    'merge': ('merge',),
+    'correlate': ('crosscorr',),
+    'events': ('events',),
+    'report': ('report',),
+}
+
+# Names that stand for several stages
+ALIASES = {'load': ('news', 'prices')}
+
+
+# Every stage needed for `names`, each after the stages it requires
+def resolve(names):
+    order = []
+
+    def visit(name):
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage: {name}")
+        if name in order:
+            return
+        for required in STAGES[name][1]:
+            visit(required)
+        order.append(name)
+
+    for name in names:
+        for stage in ALIASES.get(name, (name,)):
+            visit(stage)
+    return order
+
+
+# The options a stage function accepts; unset (None) options keep the function's defaults
+def stage_options(func, options):
+    parameters = inspect.signature(func).parameters
+    return {name: value for name, value in options.items() if name in parameters and value is not None}
+
+
+# Run the requested stages and the stages they require, returning every result by stage name
+def run_stages(names, **options):
+    results = {}
+    for name in resolve(names):
+        func, requires = STAGES[name]
+        results[name] = func(*[results[required] for required in requires], **stage_options(func, options))
+    return results
@@ -0,0 +1,158 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+from gensim import corpora, models
+from gensim.parsing.preprocessing import STOPWORDS
+from gensim.utils import simple_preprocess
+
+from .loader import DATA_DIR, NEWS_PATH
+
+# Where the dictionary, corpora and trained model are saved
+MODEL_DIR = os.path.join(DATA_DIR, "cache", "topics")
+
+# Headlines processed per step when building the dictionary and corpus
+CHUNK_SIZE = 50_000
+
+# Arrays stored as separate .npy files so they can be memory-mapped on load: the topic-word
+# weights of the model, and the sufficient statistics of its state, which gensim saves to a
+# file of its own (lda.model.state)
+MODEL_ARRAYS = ['expElogbeta']
+STATE_ARRAYS = ['sstats']
+
+
+# Lowercase, tokenize and drop stop words and very short tokens
+def tokenize(headline):
+    return [token for token in simple_preprocess(headline, min_len=3) if token not in STOPWORDS]
+
+
+# Re-iterable stream of headlines read from the news CSV in chunks
+class CsvHeadlines:
+    def __init__(self, path=NEWS_PATH, chunksize=CHUNK_SIZE):
+        self.path = path
+        self.chunksize = chunksize
+
+    def __iter__(self):
+        for chunk in pd.read_csv(self.path, usecols=['headline'], chunksize=self.chunksize):
+            yield from chunk['headline'].dropna()
+
+
+# Re-iterable stream of bag-of-words vectors, tokenizing headlines as they are read
+class HeadlineCorpus:
+    def __init__(self, headlines, dictionary):
+        self.headlines = headlines
+        self.dictionary = dictionary
+
+    def __iter__(self):
+        for headline in self.headlines:
+            if isinstance(headline, str):
+                yield self.dictionary.doc2bow(tokenize(headline))
+
+
+# Build the dictionary in one streaming pass, then drop very rare and very common tokens
+def build_dictionary(headlines, chunk_size=CHUNK_SIZE, no_below=5, no_above=0.5, keep_n=100_000):
+    dictionary = corpora.Dictionary()
+    batch = []
+    for headline in headlines:
+        if isinstance(headline, str):
+            batch.append(tokenize(headline))
+        if len(batch) >= chunk_size:
+            dictionary.add_documents(batch)
+            batch = []
+    dictionary.add_documents(batch)
+    dictionary.filter_extremes(no_below=no_below, no_above=no_above, keep_n=keep_n)
+    return dictionary
+
+
+# Paths of the saved artefacts
+def dictionary_path(model_dir=MODEL_DIR):
+    return os.path.join(model_dir, "headlines.dict")
+
+
+def model_path(model_dir=MODEL_DIR):
+    return os.path.join(model_dir, "lda.model")
+
+
+def corpus_path(model_dir=MODEL_DIR, name="corpus"):
+    return os.path.join(model_dir, f"{name}.mm")
+
+
+def seen_path(model_dir=MODEL_DIR):
+    return os.path.join(model_dir, "headlines.npy")
+
+
+# Sorted hashes of the distinct texts of a batch of headlines
+def headline_hashes(headlines):
+    return np.unique(pd.util.hash_array(pd.Series(headlines).dropna().astype(object).to_numpy()))
+
+
+# Stream a corpus to Matrix Market format; the result is read back lazily from disk
+def serialize_corpus(headlines, dictionary, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    corpora.MmCorpus.serialize(path, HeadlineCorpus(headlines, dictionary))
+    return corpora.MmCorpus(path)
+
+
+# Save the model with its large arrays as separate files that can be memory-mapped. LdaModel.save
+# does not pass `separately` on to the state, so the state is saved again with its own arrays.
+def save_model(lda, model_dir=MODEL_DIR):
+    os.makedirs(model_dir, exist_ok=True)
+    lda.save(model_path(model_dir), separately=MODEL_ARRAYS)
+    lda.state.save(model_path(model_dir) + '.state', separately=STATE_ARRAYS)
+
+
+# Build the dictionary and corpus and train a multicore LDA model from scratch
+def train_topics(headlines, num_topics=10, model_dir=MODEL_DIR, workers=None, passes=1,
+                 chunksize=2000, random_state=None):
+    dictionary = build_dictionary(headlines)
+    os.makedirs(model_dir, exist_ok=True)
+    dictionary.save(dictionary_path(model_dir))
+    corpus = serialize_corpus(headlines, dictionary, corpus_path(model_dir))
+
+    workers = workers or max(1, (os.cpu_count() or 1) - 1)
+    lda = models.LdaMulticore(corpus, num_topics=num_topics, id2word=dictionary, workers=workers,
+                              passes=passes, chunksize=chunksize, random_state=random_state)
+    save_model(lda, model_dir)
+    return lda, dictionary
+
+
+# Fold a new batch of headlines (e.g. one day of news) into the saved model with online LDA.
+# The vocabulary is fixed by the original dictionary; unseen words are ignored.
+def update_topics(headlines, name, model_dir=MODEL_DIR):
+    dictionary = corpora.Dictionary.load(dictionary_path(model_dir))
+    lda = models.LdaMulticore.load(model_path(model_dir))
+    corpus = serialize_corpus(headlines, dictionary, corpus_path(model_dir, name))
+    lda.update(corpus)
+    save_model(lda, model_dir)
+    return lda
+
+
+# Load the saved model (memory-mapped), its dictionary and every saved corpus
+def load_topics(model_dir=MODEL_DIR, mmap='r'):
+    dictionary = corpora.Dictionary.load(dictionary_path(model_dir))
+    lda = models.LdaMulticore.load(model_path(model_dir), mmap=mmap)
+    corpus_files = sorted(glob.glob(os.path.join(model_dir, "*.mm")))
+    return lda, dictionary, [corpora.MmCorpus(path) for path in corpus_files]
+
+
+# Train a model if none is saved yet, otherwise load it and fold the headlines whose text it has
+# not seen yet (e.g. the latest days of a growing archive) into it with update_topics. Headlines
+# since removed from the archive stay in the model; delete the model directory to retrain.
+def get_topics(headlines, num_topics=10, model_dir=MODEL_DIR, **kwargs):
+    headlines = pd.Series(headlines).dropna()
+    if not os.path.exists(model_path(model_dir)):
+        lda, dictionary = train_topics(headlines, num_topics, model_dir, **kwargs)
+        np.save(seen_path(model_dir), headline_hashes(headlines))
+        return lda, dictionary
+
+    # A model trained without get_topics is taken to have seen these headlines
+    hashes = pd.util.hash_array(headlines.astype(object).to_numpy())
+    seen = np.load(seen_path(model_dir)) if os.path.exists(seen_path(model_dir)) else np.unique(hashes)
+    new = ~np.isin(hashes, seen)
+    if new.any():
+        updates = len(glob.glob(corpus_path(model_dir, "update_*")))
+        update_topics(headlines[new], f"update_{updates:04d}", model_dir)
+    np.save(seen_path(model_dir), np.union1d(seen, hashes))
+    lda, dictionary, _ = load_topics(model_dir)
+    return lda, dictionary
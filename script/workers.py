@@ -0,0 +1,14 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# How worker processes are started. They are never forked from the calling process, which may be
+# running pipeline stages on other threads (a fork copies their held locks but not the threads):
+# a fork server forks them from a clean single-threaded process, or, where there is none, they
+# are spawned. Either way a worker imports the module of the function it runs, so the scripts'
+# `if __name__ == '__main__'` guards keep it from re-running them.
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+# A process pool whose workers are started safely from any thread
+def process_pool(max_workers):
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD))
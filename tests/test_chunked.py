@@ -0,0 +1,57 @@
+import functools
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from script import analysis, chunked
+from script.loader import load_news
+
+pytest.importorskip('textblob')
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+
+# A small news CSV laid out like raw_analysis_ratings.csv, with a duplicated row, a missing
+# headline and publishers given by name and by email address. Every hour of the day and every
+# publisher has a different number of articles, as analysis.py leaves the order of ties open.
+@pytest.fixture
+def news_path(tmp_path):
+    rng = np.random.default_rng(0)
+    words = np.array(['good', 'bad', 'great', 'terrible', 'stock', 'shares', 'rises', 'falls', 'apple', 'earnings'])
+    hours = np.repeat(np.arange(24), np.arange(1, 25))
+    n = len(hours)
+    dates = (pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 200, n), unit='D')
+             + pd.to_timedelta(hours, unit='h'))
+    publishers = np.repeat(['Lisa Levin', 'Benzinga Newsdesk', 'a@example.com', 'b@gmail.com'], [130, 90, 50, 30])
+    news = pd.DataFrame({
+        'headline': [' '.join(rng.choice(words, rng.integers(3, 8))).capitalize() for _ in range(n)],
+        'url': 'https://example.com/news',
+        'publisher': rng.permutation(publishers),
+        'date': dates.strftime('%Y-%m-%d %H:%M:%S-04:00'),
+        'stock': rng.choice(['AAA', 'BBB', 'CCC'], n),
+    })
+    news.loc[7] = news.loc[3]
+    news.loc[11, 'headline'] = None
+    path = tmp_path / 'news.csv'
+    news.to_csv(path)
+    return path
+
+
+def test_streamed_report_matches_analysis(news_path, tmp_path, capsys, monkeypatch):
+    cache_path = str(tmp_path / 'sentiment.pkl')
+    monkeypatch.setattr(analysis, 'score_headlines', functools.partial(analysis.score_headlines, cache_path=cache_path))
+    monkeypatch.setattr(plt, 'show', lambda: plt.close('all'))
+
+    data = load_news(news_path, cache_dir=str(tmp_path / 'cache'))
+    analysis.describe_news(data)
+    analysis.plot_publication_calendar(data)
+    analysis.analyze_sentiment(data)
+    analysis.analyze_phrases(data)
+    analysis.analyze_publication_hours(data)
+    analysis.analyze_publishers(data)
+    expected = capsys.readouterr().out
+
+    chunked.stream_statistics(news_path, chunksize=64, count_duplicates=True, cache_path=cache_path).report()
+    assert capsys.readouterr().out == expected
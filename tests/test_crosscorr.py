@@ -0,0 +1,23 @@
+import numpy as np
+
+from script.benchmark import apply_correlation_grid, make_merged_returns
+from script.crosscorr import LAGS, WINDOWS, lagged_correlation, rolling_correlation
+
+
+# The cumulative-sum engine gives the correlations of correlation.py's per-ticker apply, for
+# every lag and window, on returns with sentiment missing on most days
+def test_engine_matches_apply_grid():
+    merged = make_merged_returns(n_tickers=4, n_days=400)
+    naive_lagged, naive_rolling = apply_correlation_grid(merged)
+
+    lagged = lagged_correlation(merged)
+    np.testing.assert_allclose(lagged.to_numpy(), naive_lagged.loc[lagged.index, list(LAGS)].to_numpy(),
+                               rtol=1e-9, atol=1e-12)
+
+    rolling = rolling_correlation(merged)
+    for window in WINDOWS:
+        for lag in LAGS:
+            expected = naive_rolling[(window, lag)].to_numpy()
+            actual = rolling[(window, lag)].to_numpy(dtype='float64')
+            assert np.array_equal(np.isnan(actual), np.isnan(expected)), (window, lag)
+            np.testing.assert_allclose(actual, expected, atol=1e-5, err_msg=str((window, lag)))
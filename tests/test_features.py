@@ -0,0 +1,9 @@
+from script.benchmark import apply_features, make_news_features, vectorized_features
+
+
+# The vectorized features equal analysis.py's former per-row helpers, value for value
+def test_vectorized_features_match_per_row_helpers():
+    data = make_news_features(20_000)
+    expected, actual = apply_features(data), vectorized_features(data)
+    for column in expected:
+        assert expected[column].astype(object).equals(actual[column].astype(object)), column
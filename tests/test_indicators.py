@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from script.indicators import DEFAULT_INDICATORS, IndicatorStream, append_bars, compute_indicator
+from script.panel import compute_panel
+
+talib = pytest.importorskip('talib')
+
+
+# A random-walk close price series
+def closes(n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+
+
+# The talib indicators of a close price series, by column name
+def expected(close):
+    columns = {}
+    for indicator, params in DEFAULT_INDICATORS:
+        columns.update(compute_indicator(close, indicator, params))
+    return columns
+
+
+# Same warm-up period and the same values up to floating-point rounding
+def assert_matches(actual, expected):
+    for name, values in expected.items():
+        assert np.array_equal(np.isnan(actual[name]), np.isnan(values)), f"{name}: warm-up period differs"
+        np.testing.assert_allclose(actual[name], values, rtol=1e-9, atol=1e-12, err_msg=name)
+
+
+# Split a series at random points into `n_batches` non-empty batches
+def random_batches(close, n_batches, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.split(close, np.sort(rng.choice(np.arange(1, len(close)), n_batches - 1, replace=False)))
+
+
+@pytest.mark.parametrize('n_batches', [1, 7, 300])
+def test_stream_matches_talib_in_any_batches(n_batches):
+    close = closes(1000)
+    stream = IndicatorStream()
+    streamed = pd.concat([stream.append(batch) for batch in random_batches(close, n_batches)], ignore_index=True)
+    assert_matches(streamed, expected(close))
+
+
+def test_stream_state_round_trips_between_batches():
+    close = closes(1000, seed=1)
+    stream, batches = IndicatorStream(), []
+    for batch in random_batches(close, 40, seed=1):
+        stream = IndicatorStream.from_dict(stream.to_dict())
+        batches.append(stream.append(batch))
+    assert_matches(pd.concat(batches, ignore_index=True), expected(close))
+
+
+def test_append_bars_resumes_from_saved_state(tmp_path):
+    close = closes(600, seed=2)
+    batches = [append_bars('AAA', batch, store_dir=str(tmp_path)) for batch in random_batches(close, 12, seed=2)]
+    assert_matches(pd.concat(batches, ignore_index=True), expected(close))
+    assert IndicatorStream.load('AAA', store_dir=str(tmp_path)).count == len(close)
+
+
+def test_panel_matches_talib_per_ticker():
+    dates = pd.bdate_range('2015-01-01', periods=800)
+    # Ragged histories, including one shorter than the longest warm-up period
+    lengths = {'AAA': 800, 'BBB': 450, 'CCC': 150}
+    prices = pd.concat([pd.DataFrame({'Date': dates[:n], 'Stock': stock, 'Close': closes(n, seed=i)})
+                        for i, (stock, n) in enumerate(lengths.items())], ignore_index=True)
+    panel = compute_panel(prices)
+    for stock, data in panel.groupby('Stock', observed=True):
+        assert len(data) == lengths[stock]
+        assert_matches(data, expected(data['Close'].to_numpy()))
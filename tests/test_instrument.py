@@ -0,0 +1,43 @@
+import threading
+
+from script import instrument
+from script.workers import process_pool
+
+
+# A task that records a stage and counters of its own, as a chart worker does
+def plot(n):
+    with instrument.stage('plotting'):
+        instrument.count('charts', n)
+    instrument.count('tasks')
+    return n
+
+
+def test_worker_records_are_merged_under_the_current_stage():
+    with instrument.recording() as report:
+        with instrument.stage('report'), process_pool(2) as executor:
+            assert list(instrument.map_recorded(executor, plot, [1, 2, 3])) == [1, 2, 3]
+
+    assert report.counters == {'charts': 6, 'tasks': 3}
+    assert report.stages['report/plotting']['calls'] == 3
+    assert report.stages['report/plotting']['counters'] == {'charts': 6}
+    assert report.stages['report']['counters'] == {'tasks': 3}
+
+
+def test_one_stage_is_profiled_at_a_time(tmp_path):
+    started, release = threading.Barrier(3), threading.Event()
+
+    def work(name):
+        with instrument.stage(name):
+            started.wait()
+            release.wait()
+
+    with instrument.recording(profile_dir=str(tmp_path)) as report:
+        threads = [threading.Thread(target=instrument.inherit(work), args=(name,)) for name in ['a', 'b']]
+        for thread in threads:
+            thread.start()
+        started.wait()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    assert sorted('profile' in report.stages[name] for name in ['a', 'b']) == [False, True]
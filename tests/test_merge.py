@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from script.merge import merge_daily_sentiment
+
+
+# correlation.py's former join: daily means of all, positive and negative sentiment by
+# (date, stock), each merged onto the prices by calendar day
+def baseline_merge(prices, news):
+    news = news.assign(date=news['date'].dt.date)
+    prices = prices.assign(Day=prices['Date'].dt.date)
+    merged = prices.copy()
+    for column, rows in [('Sentiment', news), ('Positive_Sentiment', news[news['Sentiment'] > 0]),
+                         ('Negative_Sentiment', news[news['Sentiment'] < 0])]:
+        daily = rows.groupby(['date', 'stock'])['Sentiment'].mean().reset_index()
+        merged[column] = pd.merge(prices, daily, left_on=['Day', 'Stock'], right_on=['date', 'stock'],
+                                  how='left')['Sentiment'].to_numpy()
+    return merged
+
+
+def test_merge_matches_groupby_and_merge():
+    rng = np.random.default_rng(0)
+    days = pd.bdate_range('2020-01-01', periods=60)
+    # DDD has prices but no news, and EEE news but no prices
+    prices = pd.DataFrame({'Date': np.tile(days, 4), 'Stock': np.repeat(['AAA', 'BBB', 'CCC', 'DDD'], len(days)),
+                           'Close': rng.normal(100, 1, 4 * len(days))})
+
+    # Articles on a third of the days, at New York times late enough that the UTC date differs,
+    # some with a missing score and some exactly neutral
+    n = 400
+    local = days[rng.integers(0, len(days) // 3, n) * 3] + pd.to_timedelta(rng.integers(0, 24 * 60, n), unit='min')
+    news = pd.DataFrame({'date': local.tz_localize('America/New_York'),
+                         'stock': rng.choice(['AAA', 'BBB', 'CCC', 'EEE'], n),
+                         'Sentiment': np.round(rng.normal(0, 0.3, n), 1)})
+    news.loc[rng.choice(n, 20, replace=False), 'Sentiment'] = np.nan
+
+    merged = merge_daily_sentiment(prices, news)
+    expected = baseline_merge(prices, news)
+    for column in ['Sentiment', 'Positive_Sentiment', 'Negative_Sentiment']:
+        np.testing.assert_allclose(merged[column].to_numpy(), expected[column].to_numpy(), rtol=1e-12,
+                                   err_msg=column)
+    assert merged.loc[merged['Stock'] == 'DDD', 'Sentiment'].isna().all()
+    assert merged['Sentiment'].notna().any() and merged['Sentiment'].isna().any()
+    pd.testing.assert_frame_equal(merged[prices.columns], prices)
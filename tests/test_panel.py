@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from script.panel import panel_sma
+
+
+# A missing close makes every window that contains it NaN and leaves the others exact, like a
+# rolling mean; ragged histories are padded with NaN at the bottom
+def test_sma_is_nan_only_for_windows_with_missing_values():
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, (400, 3)), axis=0)
+    close[120, 0] = np.nan
+    close[300:, 1] = np.nan
+    for period in [5, 50, 200]:
+        expected = pd.DataFrame(close).rolling(period).mean().to_numpy()
+        actual = panel_sma(close, period)
+        assert np.array_equal(np.isnan(actual), np.isnan(expected)), period
+        np.testing.assert_allclose(actual, expected, rtol=1e-10, err_msg=str(period))
+    assert np.isnan(panel_sma(close, 50)[120:170, 0]).all()
+    assert not np.isnan(panel_sma(close, 50)[170:, 0]).any()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from script import pipeline
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(pipeline.__file__))
+
+
+# A copy of the package next to a small synthetic news archive and three price files, laid
+# out like the repository so the copy's data paths point at the synthetic data
+@pytest.fixture
+def repo(tmp_path):
+    shutil.copytree(PACKAGE_DIR, tmp_path / 'script', ignore=shutil.ignore_patterns('__pycache__'))
+    data_dir = tmp_path / 'src' / 'data'
+    data_dir.mkdir(parents=True)
+
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2020-01-01', periods=120)
+    for stock in ['AAA', 'BBB', 'CCC']:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Open': close, 'High': close, 'Low': close,
+                      'Close': close, 'Adj Close': close, 'Volume': 1000, 'Dividends': 0.0,
+                      'Stock Splits': 0.0}).to_csv(data_dir / f"{stock}_historical_data.csv", index=False)
+
+    words = np.array(['good', 'bad', 'great', 'terrible', 'stock', 'shares', 'rises', 'falls'])
+    n = 600
+    pd.DataFrame({
+        'headline': [' '.join(rng.choice(words, 5)) for _ in range(n)],
+        'url': 'https://example.com/news',
+        'publisher': rng.choice(['Lisa Levin', 'a@example.com'], n),
+        'date': (dates[rng.integers(0, len(dates), n)] + pd.Timedelta(hours=10)).strftime('%Y-%m-%d %H:%M:%S-04:00'),
+        'stock': rng.choice(['AAA', 'BBB', 'CCC'], n),
+    }).to_csv(data_dir / 'raw_analysis_ratings.csv')
+    return tmp_path
+
+
+# The stages a `python -m script.cli` run in the copy executed
+def ran(repo, *args):
+    result = subprocess.run([sys.executable, '-m', 'script.cli', *args], cwd=repo, capture_output=True, text=True,
+                            env={**os.environ, 'MPLBACKEND': 'Agg'}, check=True)
+    line = next(line for line in result.stdout.splitlines() if line.startswith('Ran: '))
+    return set(line[len('Ran: '):].split(', ')) - {'nothing (all cached)'}
+
+
+def test_editing_a_dependency_reruns_the_stages_that_use_it(repo):
+    assert ran(repo, 'correlate') == {'news', 'prices', 'sentiment', 'indicators', 'merge', 'correlate'}
+    assert ran(repo, 'correlate') == set()
+
+    # A module no correlation stage uses leaves every result valid
+    with open(repo / 'script' / 'report.py', 'a') as f:
+        f.write("\n# edited\n")
+    assert ran(repo, 'correlate') == set()
+
+    # The correlation engine is not in stages.py, but changing it reruns the correlation
+    with open(repo / 'script' / 'crosscorr.py', 'a') as f:
+        f.write("\n# edited\n")
+    assert ran(repo, 'correlate') == {'correlate'}
+
+    # The indicator panel feeds the merge, which feeds the correlation
+    with open(repo / 'script' / 'panel.py', 'a') as f:
+        f.write("\n# edited\n")
+    assert ran(repo, 'correlate') == {'news', 'prices', 'indicators', 'merge', 'correlate'}
+
+
+def test_code_hash_follows_package_imports():
+    assert {'loader', 'panel', 'plotting', 'events'} <= pipeline.package_imports('report')
+    assert pipeline.code_hash('correlate') != pipeline.code_hash('merge')
+    assert pipeline.code_hash('news') == pipeline.code_hash('prices')
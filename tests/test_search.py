@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from script import search
+
+
+# A news archive of one article a day, with row numbers from `start`
+def news(headlines, start=0):
+    return pd.DataFrame({
+        'headline': headlines,
+        'url': 'https://example.com/news',
+        'publisher': 'Lisa Levin',
+        'date': [f"2020-06-{day:02d} 10:00:00-04:00" for day in range(start + 1, start + len(headlines) + 1)],
+        'stock': 'AAA',
+    }, index=range(start, start + len(headlines)))
+
+
+# Update and query an index kept next to the test's archives
+@pytest.fixture
+def index(tmp_path):
+    def update(path):
+        return search.update_index(path, str(tmp_path / 'search.sqlite'), cache_dir=str(tmp_path / 'cache'))
+
+    def find(words):
+        return sorted(search.search(words, index_path=str(tmp_path / 'search.sqlite'))['SNo'])
+    return update, find
+
+
+def test_update_index_follows_appends_edits_and_deletes(tmp_path, index):
+    update, find = index
+    path = tmp_path / 'news.csv'
+    articles = news(['Stocks rise', 'Stocks fall', 'Oil rallies'])
+    articles.to_csv(path)
+    assert update(path) == (3, 0)
+    assert update(path) == (0, 0)
+    assert find('stocks') == [0, 1]
+
+    articles = pd.concat([articles, news(['Stocks jump'], start=3)])
+    articles.to_csv(path)
+    assert update(path) == (1, 0)
+    assert find('stocks') == [0, 1, 3]
+
+    articles.loc[1, 'headline'] = 'Gold slides'
+    articles = articles.drop(index=0)
+    articles.to_csv(path)
+    assert update(path) == (1, 1)
+    assert find('stocks') == [3]
+    assert find('gold') == [1]
+    assert find('fall') == []
+    assert find('rise') == []
+
+
+def test_archives_share_an_index_without_colliding(tmp_path, index):
+    update, find = index
+    news(['Stocks rise']).to_csv(tmp_path / 'a.csv')
+    news(['Stocks fall']).to_csv(tmp_path / 'b.csv')
+    assert update(tmp_path / 'a.csv') == (1, 0)
+    assert update(tmp_path / 'b.csv') == (1, 0)
+    assert find('stocks') == [0, 0]
+    assert find('fall') == [0]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from script import sentiment
+from script.sentiment import load_cache, score_headlines
+
+textblob = pytest.importorskip('textblob')
+
+
+# Headlines with repeats (syndicated stories), differently cased copies and missing values
+@pytest.fixture
+def headlines():
+    rng = np.random.default_rng(0)
+    texts = ['Stocks rise on strong earnings', 'Shares fall after a terrible quarter', 'Price target raised',
+             'stocks rise on strong earnings', 'Analyst downgrades the stock', 'Great results, bad outlook']
+    values = pd.Series(rng.choice(texts, 200), index=pd.RangeIndex(100, 300), dtype=object)
+    values[rng.choice(values.index, 10, replace=False)] = np.nan
+    return values
+
+
+# analysis.py's original per-row TextBlob polarity
+def per_row(headlines):
+    return headlines.apply(lambda text: textblob.TextBlob(text).sentiment.polarity if isinstance(text, str) else np.nan)
+
+
+def test_scores_equal_per_row_textblob(headlines, tmp_path, monkeypatch):
+    cache_path = str(tmp_path / 'sentiment.pkl')
+    expected = per_row(headlines)
+
+    cold = score_headlines(headlines, cache_path=cache_path)
+    pd.testing.assert_series_equal(cold, expected, check_names=False)
+    assert len(load_cache(cache_path)) == headlines.nunique()
+
+    # Served from the cache file without scoring anything
+    monkeypatch.setattr(sentiment, '_score_unique', lambda *args: pytest.fail("headline scored again"))
+    warm = score_headlines(headlines, cache_path=cache_path, n_jobs=1)
+    pd.testing.assert_series_equal(warm, expected, check_names=False)
+
+
+def test_process_pool_scores_equal_per_row_textblob(headlines, monkeypatch):
+    monkeypatch.setattr(sentiment, 'MIN_PARALLEL', 1)
+    pd.testing.assert_series_equal(score_headlines(headlines, cache_path=None, n_jobs=2, chunk_size=2),
+                                   per_row(headlines), check_names=False)
+
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('gensim')
+
+from script import topics  # noqa: E402
+
+
+# Headlines drawn from two vocabularies, so the topics have something to find
+def headlines(n, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabularies = [['earnings', 'revenue', 'quarter', 'guidance', 'profit', 'beats'],
+                    ['merger', 'acquisition', 'deal', 'buyout', 'takeover', 'bid']]
+    return pd.Series([' '.join(rng.choice(vocabularies[i % 2], 5)) + f" report {i % 7}" for i in range(n)])
+
+
+def test_saved_state_is_memory_mapped(tmp_path):
+    model_dir = str(tmp_path / 'topics')
+    topics.get_topics(headlines(300), num_topics=2, model_dir=model_dir, workers=1, random_state=0)
+    lda, _, _ = topics.load_topics(model_dir)
+    assert isinstance(lda.state.sstats, np.memmap)
+    assert isinstance(lda.expElogbeta, np.memmap)
+
+
+def test_new_headlines_are_folded_into_the_saved_model(tmp_path, monkeypatch):
+    model_dir = str(tmp_path / 'topics')
+    first = headlines(300)
+    topics.get_topics(first, num_topics=2, model_dir=model_dir, workers=1, random_state=0)
+
+    updated = []
+    update_topics = topics.update_topics
+    monkeypatch.setattr(topics, 'update_topics', lambda batch, *args: updated.append(len(batch)) or
+                        update_topics(batch, *args))
+
+    # Unchanged headlines load the model as saved
+    topics.get_topics(first, num_topics=2, model_dir=model_dir)
+    assert updated == []
+
+    # Only the headlines not seen before are folded in, once
+    grown = pd.concat([first, headlines(50, seed=1)], ignore_index=True)
+    new = (~grown.isin(first)).sum()
+    lda, _ = topics.get_topics(grown, num_topics=2, model_dir=model_dir)
+    topics.get_topics(grown, num_topics=2, model_dir=model_dir)
+    assert updated == [new]
+    assert os.path.exists(topics.corpus_path(model_dir, 'update_0000'))
+    assert lda.state.numdocs == len(first) + new